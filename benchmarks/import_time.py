@@ -0,0 +1,69 @@
+# Standard library imports
+import os
+import subprocess
+import sys
+import time
+
+# Repo path (the modules are imported from the repository root)
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Statement whose import time is measured
+IMPORT_STATEMENT = "import metrics.slp, metrics.co2"
+
+# Maximum wall time in seconds of the fastest run (interpreter start-up included)
+IMPORT_TIME_BUDGET = 0.4
+
+# Number of timed runs
+N_RUNS = 5
+
+# Modules that must only be loaded on first use
+LAZY_MODULES = ['netCDF4', 'scipy', 'pandas', 'matplotlib', 'seaborn']
+
+
+def measure_import_time(statement=IMPORT_STATEMENT, n_runs=N_RUNS):
+    """Measure the wall time of a fresh interpreter running `statement`.
+
+    Parameters
+    ----------
+    statement: str (default=IMPORT_STATEMENT)
+        Python statement to run.
+
+    n_runs: int (default=N_RUNS)
+        Number of timed runs.
+
+    Returns
+    -------
+    import_time: float
+        Wall time in seconds of the fastest run.
+    """
+
+    times = []
+
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=REPO_PATH, check=True)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def get_loaded_modules(statement=IMPORT_STATEMENT, modules=LAZY_MODULES):
+    """Get the modules of `modules` loaded by a fresh interpreter running `statement`."""
+
+    check = "{}; import sys; print(' '.join(m for m in {!r} if m in sys.modules))".format(statement, modules)
+    output = subprocess.run(
+        [sys.executable, "-c", check], cwd=REPO_PATH, check=True, capture_output=True, text=True
+    )
+
+    return output.stdout.split()
+
+
+if __name__ == '__main__':
+
+    loaded_modules = get_loaded_modules()
+    import_time = measure_import_time()
+
+    print("{}: {:.3f} s (budget {:.3f} s)".format(IMPORT_STATEMENT, import_time, IMPORT_TIME_BUDGET))
+
+    assert not loaded_modules, "{} loaded at import time".format(', '.join(loaded_modules))
+    assert import_time < IMPORT_TIME_BUDGET, "import time over budget"
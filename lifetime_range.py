@@ -45,33 +45,24 @@ rr_rad_eff, rad_eff, rad_eff_a = variables.compute_radiative_efficiency(
 # avg = lifetime
 # max = lifetime + lifetime standard deviation
 
-artp_dict = dict()
-iartp_dict = dict()
-
-artp_dict['min'] = []
-artp_dict['avg'] = []
-artp_dict['max'] = []
-iartp_dict['min'] = []
-iartp_dict['avg'] = []
-iartp_dict['max'] = []
-
-for t in np.linspace(time_step, time_horizon, int(time_horizon * n_steps)):
+t = np.linspace(time_step, time_horizon, int(time_horizon * n_steps))
 
-    iartp, artp = slp.compute_atp(
-        pollutant=pollutant,
-        rad_eff=rr_rad_eff,
-        th=t,
-        lifetime_range=True
-    )
+iartp, artp = slp.compute_atp(
+    pollutant=pollutant,
+    rad_eff=rr_rad_eff,
+    th=t,
+    lifetime_range=True
+)
 
-    artp_dict['min'].append(artp[0])
-    artp_dict['avg'].append(artp[1])
-    artp_dict['max'].append(artp[2])
-    iartp_dict['min'].append(iartp[0])
-    iartp_dict['avg'].append(iartp[1])
-    iartp_dict['max'].append(iartp[2])
+artp_dict = dict()
+iartp_dict = dict()
 
-    print("\rt = {:5.2f}".format(t), flush=True, end=" ")
+artp_dict['min'] = artp[:, 0]
+artp_dict['avg'] = artp[:, 1]
+artp_dict['max'] = artp[:, 2]
+iartp_dict['min'] = iartp[:, 0]
+iartp_dict['avg'] = iartp[:, 1]
+iartp_dict['max'] = iartp[:, 2]
 
 # Plot figure
 sensitivity.plot_lifetime_range(artp_dict, iartp_dict, time_horizon)
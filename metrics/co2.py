@@ -4,6 +4,7 @@ import numpy as np
 # Local application imports
 from utils import constants
 from simulations import variables
+from metrics.potentials import Potentials
 
 # Load constants
 D = constants.D
@@ -14,8 +15,13 @@ TAU = constants.SPECS['CO2']['tau']
 Fp = constants.SPECS['CO2']['fp']
 K = constants.SPECS['CO2']['k']
 
-# Get scaled climate sensitivity
-C_SCALED = variables.get_scaled_climate_sensitivity('CO2')
+
+def __getattr__(name):
+    # The scaled climate sensitivity `C_SCALED` is computed on first access
+    if name == 'C_SCALED':
+        return variables.get_scaled_climate_sensitivity('CO2')
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 def compute_atp(rad_eff, th):
@@ -25,49 +31,89 @@ def compute_atp(rad_eff, th):
 
     Parameters
     ----------
-    rad_eff: float
+    rad_eff: float or array of floats
         Radiative efficiency for CO2 experiments.
 
-    th: int
-        Time horizon.
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
 
     Returns
     -------
-    iatp: float
+    iatp: float or array of floats
         Integrated absolute (either regional or global) temperature potential.
+        If `th` is an array, the shape is th.shape + shape of `rad_eff`.
 
-    atp: float
+    atp: float or array of floats
         Pulse absolute (either regional or global) temperature potential.
+        Same shape as `iatp`.
 
     """
 
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.ndim(rad_eff))
+
+    # Get the climate (j) and carbon cycle (i) response terms with
+    # the time horizons as leading dimensions and the modes as last ones
+    c_scaled = np.array(variables.get_scaled_climate_sensitivity('CO2'))
+    d, ai, tau = np.array(D), np.array(Ai), np.array(TAU)
+    exp_d = np.exp(-np.expand_dims(th, -1) / d)
+    exp_tau = np.exp(-np.expand_dims(th, -1) / tau)
+    b = (ai * tau)[:, np.newaxis] * c_scaled / (tau[:, np.newaxis] - d)
+
     # Compute the integrated absolute temperature potential
     iatp = rad_eff * (
-            sum(
-                A0 * C_SCALED[j] * (th - D[j] * (1 - np.exp(-th / D[j]))) +
-                sum(
-                    ((Ai[i] * TAU[i] * C_SCALED[j]) / (TAU[i] - D[j])) *
-                    (TAU[i] * (1 - np.exp(-th / TAU[i])) - D[j] * (1 - np.exp(-th / D[j])))
-                    for i in range(3)
-                ) for j in range(2)
-            )
+        np.sum(A0 * c_scaled * (np.expand_dims(th, -1) - d * (1 - exp_d)), axis=-1) +
+        np.sum(b * ((tau * (1 - exp_tau))[..., :, np.newaxis] - (d * (1 - exp_d))[..., np.newaxis, :]), axis=(-2, -1))
     )
 
     # Compute the pulse absolute temperature potential
     atp = rad_eff * (
-        sum(
-            A0 * C_SCALED[j] * (1 - np.exp(-th / D[j])) +
-            sum(
-                ((Ai[i] * TAU[i] * C_SCALED[j]) / (TAU[i] - D[j])) *
-                (np.exp(-th / TAU[i]) - np.exp(-th / D[j]))
-                for i in range(3)
-            ) for j in range(2)
-        )
+        np.sum(A0 * c_scaled * (1 - exp_d), axis=-1) +
+        np.sum(b * (exp_tau[..., :, np.newaxis] - exp_d[..., np.newaxis, :]), axis=(-2, -1))
     )
 
     return iatp, atp
 
 
+def get_atp_modes(rad_eff):
+    """Get the exponential modes of the pulse Absolute Temperature Potential (ATP)
+    for CO2, such that ATP(t) = sum(coefficients[m] * exp(-t / timescales[m])).
+
+    Parameters
+    ----------
+    rad_eff: float or array of floats
+        Radiative efficiency for CO2 experiments.
+
+    Returns
+    -------
+    coefficients: ndarray of shape (6,) + shape of `rad_eff`
+        Coefficients of the exponential modes.
+
+    timescales: ndarray of shape (6,)
+        Timescales (yr) of the exponential modes: a constant mode
+        (infinite timescale), the CO2 impulse response timescales
+        and the climate response timescales.
+    """
+
+    rad_eff = np.asarray(rad_eff, dtype=float)
+
+    c_scaled = variables.get_scaled_climate_sensitivity('CO2')
+
+    # Get the coefficients of the CO2 impulse response modes
+    b = [[(Ai[i] * TAU[i] * c_scaled[j]) / (TAU[i] - D[j]) for j in range(2)] for i in range(3)]
+
+    coefficients = np.array(
+        [rad_eff * A0 * sum(c_scaled)] +
+        [rad_eff * sum(b[i]) for i in range(3)] +
+        [-rad_eff * (A0 * c_scaled[j] + sum(b[i][j] for i in range(3))) for j in range(2)]
+    )
+    timescales = np.array([np.inf] + TAU + D)
+
+    return coefficients, timescales
+
+
 def compute_app(rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     """Compute integrated and pulse Absolute Regional
     Precipitation Potential (ARPP) for CO2.
@@ -81,10 +127,11 @@ def compute_app(rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
         Atmospheric component of the global
         radiative efficiency for CO2 experiments.
 
-    th: int
-        Time horizon.
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
 
-    rr_precip_avg: float
+    rr_precip_avg: float or array of floats
         Average regional precipitation difference.
 
     precip_avg: float
@@ -94,6 +141,7 @@ def compute_app(rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     -------
     iarpp: float
         Integrated Absolute Regional Precipitation Potential (iARPP).
+        If `th` is an array, the shape is th.shape + shape of `rr_precip_avg`.
 
     slow_iarpp: float
         Slow response component of the iARPP.
@@ -111,33 +159,175 @@ def compute_app(rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
         Fast response component of the ARPP.
     """
 
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.ndim(rr_precip_avg))
+
     # Compute the absolute global temperature potentials
     iagtp, agtp = compute_atp(rad_eff, th)
 
+    # Compute the integrated and pulse atmospheric CO2 burden terms
+    ai, tau = np.array(Ai), np.array(TAU)
+    exp_tau = np.exp(-np.expand_dims(th, -1) / tau)
+    i_burden = A0 * th + np.sum(ai * tau * (1 - exp_tau), axis=-1)
+    burden = A0 + np.sum(ai * exp_tau, axis=-1)
+
     # Compute the integrated absolute regional precipitation potential (iARPP)
-    iarpp = Cf * (K * iagtp - Fp * rad_eff_a * (
-            A0 * th + sum(Ai[i] * TAU[i] * (1 - np.exp(-th / TAU[i])) for i in range(3))
-    )) * (rr_precip_avg / precip_avg)
+    iarpp = Cf * (K * iagtp - Fp * rad_eff_a * i_burden) * (rr_precip_avg / precip_avg)
 
     # Compute the slow response component of the iARPP
     slow_iarpp = Cf * K * iagtp * (rr_precip_avg / precip_avg)
 
     # Compute the fast response component of the iARPP
-    fast_iarpp = Cf * (-Fp * rad_eff_a * (
-            A0 * th + sum(Ai[i] * TAU[i] * (1 - np.exp(-th / TAU[i])) for i in range(3))
-    )) * (rr_precip_avg / precip_avg)
+    fast_iarpp = Cf * (-Fp * rad_eff_a * i_burden) * (rr_precip_avg / precip_avg)
 
     # Compute the pulse absolute regional precipitation potential (iARPP)
-    arpp = Cf * (K * agtp - Fp * rad_eff_a * (
-            A0 + sum(Ai[i] * np.exp(-th / TAU[i]) for i in range(3))
-    )) * (rr_precip_avg / precip_avg)
+    arpp = Cf * (K * agtp - Fp * rad_eff_a * burden) * (rr_precip_avg / precip_avg)
 
     # Compute the slow response component of the iARPP
     slow_arpp = Cf * K * agtp * (rr_precip_avg / precip_avg)
 
     # Compute the fast response component of the iARPP
-    fast_arpp = Cf * (-Fp * rad_eff_a * (
-            A0 + sum(Ai[i] * np.exp(-th / TAU[i]) for i in range(3))
-    )) * (rr_precip_avg / precip_avg)
+    fast_arpp = Cf * (-Fp * rad_eff_a * burden) * (rr_precip_avg / precip_avg)
 
     return iarpp, slow_iarpp, fast_iarpp, arpp, slow_arpp, fast_arpp
+
+
+def compute_potential_kernel(rr_rad_eff, rad_eff, rad_eff_a, th, precip_ratio, a0, ai, tau, c_scaled, d, k, fp):
+    """Compute all temperature and precipitation potentials of CO2 in a single
+    pass, evaluating each exponential term only once. All arguments can be
+    arrays that broadcast against each other.
+
+    Parameters
+    ----------
+    rr_rad_eff: float or array of floats
+        Regional radiative efficiency.
+
+    rad_eff: float or array of floats
+        Global radiative efficiency.
+
+    rad_eff_a: float or array of floats
+        Atmospheric component of the global radiative efficiency.
+
+    th: float or array of floats
+        Time horizon.
+
+    precip_ratio: float or array of floats
+        Ratio between the regional and global precipitation differences.
+
+    a0: float or array of floats
+        Fraction of CO2 remaining permanently in the atmosphere.
+
+    ai: list of three floats or arrays of floats
+        Fractions of CO2 removed with timescales `tau`.
+
+    tau: list of three floats or arrays of floats
+        Timescales (yr) of the CO2 impulse response function.
+
+    c_scaled: list of two floats or arrays of floats
+        Climate sensitivities (K/m^2).
+
+    d: list of two floats or arrays of floats
+        Timescales of the climate sensitivity (yr).
+
+    k: float or array of floats
+        Factor that relates the change in RF due to surface T changes.
+
+    fp: float or array of floats
+        Ratio between the atmospheric component and the ERF.
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast
+        iARPP, ARPP, slow and fast ARPP.
+    """
+
+    # Compute the exponential terms
+    exp_tau = [np.exp(-th / tau[i]) for i in range(3)]
+    exp_d = [np.exp(-th / d[j]) for j in range(2)]
+
+    # Compute the integrated and pulse temperature potentials per unit radiative efficiency
+    unit_iatp = 0
+    unit_atp = 0
+    for j in range(2):
+        unit_iatp = unit_iatp + a0 * c_scaled[j] * (th - d[j] * (1 - exp_d[j]))
+        unit_atp = unit_atp + a0 * c_scaled[j] * (1 - exp_d[j])
+
+        for i in range(3):
+            coefficient = (ai[i] * tau[i] * c_scaled[j]) / (tau[i] - d[j])
+            unit_iatp = unit_iatp + coefficient * (tau[i] * (1 - exp_tau[i]) - d[j] * (1 - exp_d[j]))
+            unit_atp = unit_atp + coefficient * (exp_tau[i] - exp_d[j])
+
+    # Compute the integrated and pulse atmospheric CO2 burden
+    i_burden = a0 * th + sum(ai[i] * tau[i] * (1 - exp_tau[i]) for i in range(3))
+    burden = a0 + sum(ai[i] * exp_tau[i] for i in range(3))
+
+    # Compute the regional temperature potentials
+    iartp = rr_rad_eff * unit_iatp
+    artp = rr_rad_eff * unit_atp
+
+    # Compute the slow and fast components of the precipitation potentials
+    slow_iarpp = Cf * k * rad_eff * unit_iatp * precip_ratio
+    fast_iarpp = Cf * -fp * rad_eff_a * i_burden * precip_ratio
+    slow_arpp = Cf * k * rad_eff * unit_atp * precip_ratio
+    fast_arpp = Cf * -fp * rad_eff_a * burden * precip_ratio
+
+    return Potentials(
+        iartp, artp, slow_iarpp + fast_iarpp, slow_iarpp, fast_iarpp, slow_arpp + fast_arpp, slow_arpp, fast_arpp
+    )
+
+
+def compute_potentials(rr_rad_eff, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
+    """Compute integrated and pulse Absolute Regional Temperature Potentials (ARTP)
+    and Absolute Regional Precipitation Potentials (ARPP) for CO2 in a single pass.
+    Gives the same results as `compute_atp` followed by `compute_app`.
+
+    Parameters
+    ----------
+    rr_rad_eff: float or array of floats
+        Regional radiative efficiency for CO2 experiments.
+
+    rad_eff: float
+        Global radiative efficiency for CO2 experiments.
+
+    rad_eff_a: float
+        Atmospheric component of the global
+        radiative efficiency for CO2 experiments.
+
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
+
+    rr_precip_avg: float or array of floats
+        Average regional precipitation difference.
+
+    precip_avg: float
+        Global regional precipitation difference.
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast
+        iARPP, ARPP, slow and fast ARPP. If `th` is an array,
+        the time horizons are the leading dimensions.
+    """
+
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.broadcast(rr_rad_eff, rr_precip_avg).ndim)
+
+    return compute_potential_kernel(
+        rr_rad_eff=rr_rad_eff,
+        rad_eff=rad_eff,
+        rad_eff_a=rad_eff_a,
+        th=th,
+        precip_ratio=rr_precip_avg / precip_avg,
+        a0=A0,
+        ai=Ai,
+        tau=TAU,
+        c_scaled=variables.get_scaled_climate_sensitivity('CO2'),
+        d=D,
+        k=K,
+        fp=Fp
+    )
@@ -0,0 +1,125 @@
+# Third party imports
+import numpy as np
+
+# Local application imports
+from metrics import slp, co2
+from metrics.potentials import Potentials
+from simulations import variables, regions, reduction
+
+
+def compute_potential_maps(pollutant, emission_region, th):
+    """Compute integrated and pulse temperature and precipitation
+    potentials of every grid cell for all time horizons at once.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    Returns
+    -------
+    potential_maps: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast iARPP,
+        ARPP, slow and fast ARPP maps, each of shape (n_th, 145, 192).
+        Grid cells without climate variables are NaN.
+    """
+
+    th = np.atleast_1d(np.asarray(th, dtype=float))
+
+    _, _, grid_delta_precip, precip_avg, grid_rad_eff, rad_eff, rad_eff_a = variables.get_gridded_response(
+        pollutant, emission_region
+    )
+
+    if pollutant == 'CO2':
+        return co2.compute_potentials(grid_rad_eff, rad_eff, rad_eff_a, th, grid_delta_precip, precip_avg)
+
+    return slp.compute_potentials(pollutant, grid_rad_eff, rad_eff, rad_eff_a, th, grid_delta_precip, precip_avg)
+
+
+def aggregate_potential_maps(potential_maps, region_names):
+    """Aggregate potential maps over regions without recomputing them.
+
+    As the potentials are linear in the gridded temperature and precipitation
+    differences, the area-weighted average of a map over a region is equal to
+    the regional potential. All maps are averaged with a single reduction.
+
+    Parameters
+    ----------
+    potential_maps: Potentials
+        Named tuple with potential maps of shape (..., 145, 192)
+        (see `compute_potential_maps`).
+
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the regional potentials of shape (..., len(region_names)).
+    """
+
+    # Masked (NaN) grid cells do not contribute to the averages
+    maps = np.ma.masked_invalid(np.stack(potential_maps))
+    region_avg, _ = reduction.compute_area_averages(maps, region_names)
+
+    return Potentials(*region_avg)
+
+
+def save_potential_maps(path, potential_maps, th, pollutant, emission_region):
+    """Save potential maps as a chunked and compressed netCDF file.
+
+    Parameters
+    ----------
+    path: str
+        Path of the netCDF file.
+
+    potential_maps: Potentials
+        Named tuple with potential maps of shape (n_th, 145, 192).
+
+    th: int, float or array of floats
+        Time horizons of the maps.
+
+    pollutant: str
+        Name of the pollutant.
+
+    emission_region: str
+        The name of the pollutant emission region.
+    """
+
+    from utils import netcdf
+
+    lat, lon = regions.get_grid_coordinates()
+
+    netcdf.write_gridded_fields(
+        path, potential_maps._asdict(), th, lat, lon,
+        attributes={'pollutant': pollutant, 'emission_region': emission_region}
+    )
+
+
+def load_potential_maps(path):
+    """Load potential maps saved with `save_potential_maps`.
+
+    Returns
+    -------
+    potential_maps: Potentials
+        Named tuple with potential maps of shape (n_th, 145, 192).
+
+    th: ndarray of floats
+        Time horizons of the maps.
+    """
+
+    from utils import netcdf
+
+    fields, th, _, _ = netcdf.read_gridded_fields(path)
+
+    return Potentials(*[fields[name] for name in Potentials._fields]), th
@@ -0,0 +1,9 @@
+# Standard library imports
+from collections import namedtuple
+
+# Names of the potentials returned by the fused kernels
+POTENTIAL_NAMES = ['iartp', 'artp', 'iarpp', 'slow_iarpp', 'fast_iarpp', 'arpp', 'slow_arpp', 'fast_arpp']
+
+# Integrated and pulse temperature and precipitation potentials
+# (including the slow and fast components of the ARPP and iARPP)
+Potentials = namedtuple('Potentials', POTENTIAL_NAMES)
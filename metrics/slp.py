@@ -4,6 +4,7 @@ import numpy as np
 # Local application imports
 from utils import constants
 from simulations import variables, scaling
+from metrics.potentials import Potentials
 
 # Load constants
 D = constants.D
@@ -26,8 +27,9 @@ def compute_atp(pollutant, rad_eff, th, c_scaling=True, erf_scaling=True, lifeti
     rad_eff: float
         Radiative efficiency for single-lifetime pollutant experiments.
 
-    th: int
-        Time horizon.
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
 
     c_scaling: boolean (default=True)
         If True, apply climate sensitivity multi-model scaling.
@@ -44,9 +46,13 @@ def compute_atp(pollutant, rad_eff, th, c_scaling=True, erf_scaling=True, lifeti
     -------
     iatp: float or array of floats
         Integrated absolute (either regional or global) temperature potentials.
+        If `th` is an array, the time horizons are the leading dimensions
+        and the shape is th.shape + shape of `rad_eff` (broadcast with
+        the lifetime range values).
 
     atp: float or array of floats
         Pulse absolute (either regional or global) temperature potentials.
+        Same shape as `iatp`.
     """
 
     assert pollutant in constants.SLP, "{} is not an accepted pollutant".format(pollutant)
@@ -70,7 +76,11 @@ def compute_atp(pollutant, rad_eff, th, c_scaling=True, erf_scaling=True, lifeti
     # Keep or remove scaling from the radiative forcing
     if pollutant == 'SO2':
         if not erf_scaling:
-            rad_eff = rad_eff / scaling.get_mm_scaling(pollutant)[1]
+            rad_eff = rad_eff / scaling.get_mm_scaling(pollutant).rf_scaling
+
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.broadcast(rad_eff, tau).ndim)
 
     # Compute the integrated absolute temperature potential
     iatp = sum((rad_eff * tau * c_scaled[j] / (tau - D[j])) *
@@ -85,12 +95,66 @@ def compute_atp(pollutant, rad_eff, th, c_scaling=True, erf_scaling=True, lifeti
     return iatp, atp
 
 
+def get_atp_modes(pollutant, rad_eff, c_scaling=True, erf_scaling=True):
+    """Get the exponential modes of the pulse Absolute Temperature Potential (ATP),
+    such that ATP(t) = sum(coefficients[m] * exp(-t / timescales[m])).
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following single lifetime pollutants:
+        - SO2
+        - BC
+        - CH4
+
+    rad_eff: float or array of floats
+        Radiative efficiency for single-lifetime pollutant experiments.
+
+    c_scaling: boolean (default=True)
+        If True, apply climate sensitivity multi-model scaling.
+
+    erf_scaling: boolean (default=True)
+        If True, apply radiative forcing multi-model scaling.
+
+    Returns
+    -------
+    coefficients: ndarray of shape (3,) + shape of `rad_eff`
+        Coefficients of the exponential modes.
+
+    timescales: ndarray of shape (3,)
+        Timescales (yr) of the exponential modes, i.e. the
+        pollutant lifetime and the climate response timescales.
+    """
+
+    assert pollutant in constants.SLP, "{} is not an accepted pollutant".format(pollutant)
+
+    tau = constants.SPECS[pollutant]['tau']
+
+    # Get scaled climate sensitivity
+    if c_scaling:
+        c_scaled = variables.get_scaled_climate_sensitivity(pollutant)
+    else:
+        c_scaled = [constants.C1, constants.C2]
+
+    # Keep or remove scaling from the radiative forcing
+    rad_eff = np.asarray(rad_eff, dtype=float)
+    if pollutant == 'SO2':
+        if not erf_scaling:
+            rad_eff = rad_eff / scaling.get_mm_scaling(pollutant).rf_scaling
+
+    # Get the coefficients of the climate response modes
+    d_coefficients = [-(rad_eff * tau * c_scaled[j]) / (tau - D[j]) for j in range(2)]
+
+    coefficients = np.array([-sum(d_coefficients)] + d_coefficients)
+    timescales = np.array([tau] + D)
+
+    return coefficients, timescales
+
+
 def compute_app(pollutant, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     """Compute integrated and pulse Absolute Regional Precipitation
     Potential (ARPP) for single lifetime pollutants.
 
-    Parameters
-    ----------
     Parameters
     ----------
     pollutant: str
@@ -107,10 +171,11 @@ def compute_app(pollutant, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
         Change in the atmospheric component of the global
         radiative efficiency due to perturbation of `pollutant`.
 
-    th: int
-        Time horizon.
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
 
-    rr_precip_avg: float
+    rr_precip_avg: float or array of floats
         Average regional precipitation difference
         due to perturbation of `pollutant`.
 
@@ -122,6 +187,7 @@ def compute_app(pollutant, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     -------
     iarpp: array of floats
         Integrated Absolute Regional Precipitation Potential (iARPP).
+        If `th` is an array, the shape is th.shape + shape of `rr_precip_avg`.
 
     slow_iarpp: array of floats
         Slow response component of the iARPP.
@@ -146,6 +212,10 @@ def compute_app(pollutant, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     fp = constants.SPECS[pollutant]['fp']
     k = constants.SPECS[pollutant]['k']
 
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.ndim(rr_precip_avg))
+
     # Compute the absolute global temperature potentials
     iagtp, agtp = compute_atp(pollutant, rad_eff, th)
 
@@ -168,3 +238,159 @@ def compute_app(pollutant, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg):
     fast_arpp = Cf * -fp * rad_eff_a * np.exp(-th / tau) * (rr_precip_avg / precip_avg)
 
     return iarpp, slow_iarpp, fast_iarpp, arpp, slow_arpp, fast_arpp
+
+
+def compute_potential_kernel(rr_rad_eff, rad_eff, rad_eff_a, th, precip_ratio, tau, c_scaled, d, k, fp):
+    """Compute all temperature and precipitation potentials of a single lifetime
+    pollutant in a single pass, evaluating each exponential term only once.
+    All arguments can be arrays that broadcast against each other.
+
+    Parameters
+    ----------
+    rr_rad_eff: float or array of floats
+        Regional radiative efficiency.
+
+    rad_eff: float or array of floats
+        Global radiative efficiency.
+
+    rad_eff_a: float or array of floats
+        Atmospheric component of the global radiative efficiency.
+
+    th: float or array of floats
+        Time horizon.
+
+    precip_ratio: float or array of floats
+        Ratio between the regional and global precipitation differences.
+
+    tau: float or array of floats
+        Pollutant lifetime (yr).
+
+    c_scaled: list of two floats or arrays of floats
+        Climate sensitivities (K/m^2).
+
+    d: list of two floats or arrays of floats
+        Timescales of the climate sensitivity (yr).
+
+    k: float or array of floats
+        Factor that relates the change in RF due to surface T changes.
+
+    fp: float or array of floats
+        Ratio between the atmospheric component and the ERF.
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast
+        iARPP, ARPP, slow and fast ARPP.
+    """
+
+    # Compute the exponential terms
+    exp_tau = np.exp(-th / tau)
+    exp_d = [np.exp(-th / d[j]) for j in range(2)]
+
+    # Compute the integrated and pulse temperature potentials per unit radiative efficiency
+    coefficients = [tau * c_scaled[j] / (tau - d[j]) for j in range(2)]
+    unit_iatp = sum(coefficients[j] * (tau * (1 - exp_tau) - d[j] * (1 - exp_d[j])) for j in range(2))
+    unit_atp = sum(coefficients[j] * (exp_tau - exp_d[j]) for j in range(2))
+
+    # Compute the regional temperature potentials
+    iartp = rr_rad_eff * unit_iatp
+    artp = rr_rad_eff * unit_atp
+
+    # Compute the slow and fast components of the precipitation potentials
+    slow_iarpp = Cf * k * rad_eff * unit_iatp * precip_ratio
+    fast_iarpp = Cf * -fp * rad_eff_a * tau * (1 - exp_tau) * precip_ratio
+    slow_arpp = Cf * k * rad_eff * unit_atp * precip_ratio
+    fast_arpp = Cf * -fp * rad_eff_a * exp_tau * precip_ratio
+
+    return Potentials(
+        iartp, artp, slow_iarpp + fast_iarpp, slow_iarpp, fast_iarpp, slow_arpp + fast_arpp, slow_arpp, fast_arpp
+    )
+
+
+def compute_potentials(
+        pollutant, rr_rad_eff, rad_eff, rad_eff_a, th, rr_precip_avg, precip_avg, c_scaling=True, erf_scaling=True
+):
+    """Compute integrated and pulse Absolute Regional Temperature Potentials (ARTP)
+    and Absolute Regional Precipitation Potentials (ARPP) for single lifetime
+    pollutants in a single pass. Gives the same results as `compute_atp`
+    followed by `compute_app`.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following single lifetime pollutants:
+        - SO2
+        - BC
+        - CH4
+
+    rr_rad_eff: float or array of floats
+        Regional radiative efficiency change due to
+        perturbation of `pollutant`.
+
+    rad_eff: float
+        Global radiative efficiency change due to
+        perturbation of `pollutant`.
+
+    rad_eff_a: float
+        Change in the atmospheric component of the global
+        radiative efficiency due to perturbation of `pollutant`.
+
+    th: int, float or array of floats
+        Time horizon. If an array, the potentials are
+        computed for every time horizon at once.
+
+    rr_precip_avg: float or array of floats
+        Average regional precipitation difference
+        due to perturbation of `pollutant`.
+
+    precip_avg: float
+        Global regional precipitation difference
+        due to perturbation of `pollutant`.
+
+    c_scaling: boolean (default=True)
+        If True, apply climate sensitivity multi-model scaling.
+
+    erf_scaling: boolean (default=True)
+        If True, apply radiative forcing multi-model scaling to the
+        regional radiative efficiency (as in `compute_atp`; the global
+        radiative efficiencies of the precipitation potentials are
+        always scaled, as in `compute_app`).
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast
+        iARPP, ARPP, slow and fast ARPP. If `th` is an array,
+        the time horizons are the leading dimensions.
+    """
+
+    assert pollutant in constants.SLP, "{} is not an accepted pollutant".format(pollutant)
+
+    # Get scaled climate sensitivity
+    if c_scaling:
+        c_scaled = variables.get_scaled_climate_sensitivity(pollutant)
+    else:
+        c_scaled = [constants.C1, constants.C2]
+
+    # Keep or remove scaling from the radiative forcing
+    if pollutant == 'SO2':
+        if not erf_scaling:
+            rr_rad_eff = rr_rad_eff / scaling.get_mm_scaling(pollutant).rf_scaling
+
+    # Add trailing dimensions to the time horizons to broadcast them against the regions
+    if np.ndim(th) > 0:
+        th = np.reshape(th, np.shape(th) + (1,) * np.broadcast(rr_rad_eff, rr_precip_avg).ndim)
+
+    return compute_potential_kernel(
+        rr_rad_eff=rr_rad_eff,
+        rad_eff=rad_eff,
+        rad_eff_a=rad_eff_a,
+        th=th,
+        precip_ratio=rr_precip_avg / precip_avg,
+        tau=constants.SPECS[pollutant]['tau'],
+        c_scaled=c_scaled,
+        d=D,
+        k=constants.SPECS[pollutant]['k'],
+        fp=constants.SPECS[pollutant]['fp']
+    )
@@ -1,9 +1,6 @@
 # Standard library imports
 import string
 
-# Third party imports
-from matplotlib import pyplot as plt
-
 # Local application import
 from utils import constants
 
@@ -65,6 +62,7 @@ def plot_so2_bc_subplot(
         pollutant, emission_region, response_regions, potential_a, potential_b,
         std_a, std_b, potential_name, y_label, subplot_idx, th_a=20, th_b=100
 ):
+    from matplotlib import pyplot as plt
 
     n_regions = len(response_regions)
 
@@ -143,6 +141,7 @@ def plot_so2_bc_subplot(
 
 
 def plot_so2_bc_double_bars(potential_dict, std_dict, response_regions, potential_name, th_a=20, th_b=100):
+    from matplotlib import pyplot as plt
 
     assert potential_name in ['ARTP', 'ARPP', 'iARTP', 'iARPP'], (
         "{} is not an accepted potential name. Accepted potential names are 'ARTP', 'ARPP', 'iARTP', 'iARPP'".format(
@@ -195,6 +194,7 @@ def plot_ch4_co2_subplot(
         pollutant, response_regions, potentials, potential_a, potential_b,
         std_a, std_b, subplot_idx, th_a=20, th_b=100
 ):
+    from matplotlib import pyplot as plt
 
     n_regions = len(response_regions)
 
@@ -273,6 +273,7 @@ def plot_ch4_co2_subplot(
 
 
 def plot_ch4_co2_double_bars(potential_dict, std_dict, response_regions, potentials, th_a=20, th_b=100):
+    from matplotlib import pyplot as plt
 
     plt.figure(figsize=(12, 4))
 
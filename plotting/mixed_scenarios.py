@@ -1,7 +1,5 @@
 # Third party imports
 import numpy as np
-import seaborn as sns
-from matplotlib import pyplot as plt
 
 # Local application imports
 from plotting import plot_utils
@@ -19,13 +17,13 @@ LF = 0.3
 # Plot parameters
 PARAMS = {
     0: {
-        'color': sns.xkcd_rgb["pale red"]
+        'color': "xkcd:pale red"
     },
     1: {
-        'color': sns.xkcd_rgb["denim blue"]
+        'color': "xkcd:denim blue"
     },
     2: {
-        'color': sns.xkcd_rgb["brown"]
+        'color': "xkcd:brown"
     }
 }
 
@@ -33,6 +31,8 @@ PARAMS = {
 def plot_temp_mixed_scenario(
         temp_dict, time_horizons, scenarios, magnitudes, emission_region, response_region, time_step=0.01
 ):
+    import seaborn as sns
+    from matplotlib import pyplot as plt
 
     # Get name of pollutants
     pollutants = list(temp_dict.keys())
@@ -1,7 +1,5 @@
 # Third party imports
 import numpy as np
-import seaborn as sns
-from matplotlib import pyplot as plt
 
 # Local application imports
 from plotting import plot_utils
@@ -15,6 +13,8 @@ LW = 2
 
 
 def plot_scalings(artp_potentials, iartp_potentials, time_horizon):
+    import seaborn as sns
+    from matplotlib import pyplot as plt
 
     # Labels
     labels = [
@@ -105,6 +105,8 @@ def plot_scalings(artp_potentials, iartp_potentials, time_horizon):
 
 
 def plot_lifetime_range(artp_potentials, iartp_potentials, time_horizon):
+    import seaborn as sns
+    from matplotlib import pyplot as plt
 
     # Get total number of points
     n_points = len(artp_potentials['avg'])
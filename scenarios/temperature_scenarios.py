@@ -1,5 +1,6 @@
 # Third party imports
 import numpy as np
+from scipy import signal
 
 # Local application imports
 from utils import constants
@@ -9,6 +10,9 @@ from simulations import loading
 A0 = constants.SPECS['CO2']['a0']
 Ai = constants.SPECS['CO2']['ai']
 
+# Available methods to compute the temperature response
+CONVOLUTION_METHODS = ['auto', 'direct', 'fft', 'loop']
+
 
 def compute_time_step_temperature(index, emissions, artp, time_step=0.01):
     """"Compute temperature change by numerical integration.
@@ -38,8 +42,187 @@ def compute_time_step_temperature(index, emissions, artp, time_step=0.01):
         return sum([emissions[i] * (time_step * (artp[index-i] + artp[index-i-1]) / 2) for i in range(0, index)])
 
 
+def compute_temperature_response(emissions, artp, time_step=0.01, method='auto'):
+    """Compute the temperature change at each time step by numerical
+    integration (trapezoidal rule) of the emissions against the ARTP.
+
+    The integral is evaluated as a single convolution, which gives the
+    same results as calling `compute_time_step_temperature` for each
+    index, to floating-point tolerance.
+
+    Parameters
+    ----------
+    emissions: array-like
+        Array of emission values.
+
+    artp: array-like
+        Array of ARTP values with the same length as `emissions`.
+
+    time_step: float (default=0.01)
+        Length in years of the time step used
+        for numerical integration.
+
+    method: str (default='auto')
+        Method used to compute the convolution.
+        Must be one of the following:
+        - auto: choose the fastest between direct and fft
+        - direct: direct convolution (best for short series)
+        - fft: FFT convolution in O(n log n)
+        - loop: call `compute_time_step_temperature` for each index
+
+    Returns
+    -------
+    temperature: ndarray
+        Temperature change at each time step.
+    """
+
+    assert method in CONVOLUTION_METHODS, "{} is not a valid convolution method".format(method)
+
+    emissions = np.asarray(emissions, dtype=float)
+    artp = np.asarray(artp, dtype=float)
+    n = len(emissions)
+
+    if method == 'loop':
+        return np.array([compute_time_step_temperature(t, emissions, artp, time_step) for t in range(n)])
+
+    if n == 0:
+        return np.zeros(0)
+
+    # Build the trapezoidal kernel; the zero first element
+    # excludes the emission at the current time step
+    kernel = np.zeros(n)
+    kernel[1:] = time_step * (artp[1:n] + artp[0:n-1]) / 2
+
+    temperature = signal.convolve(emissions, kernel, mode='full', method=method)[:n]
+    temperature[0] = emissions[0] * (time_step * artp[0] / 2)
+
+    return temperature
+
+
+def iter_modal_temperature(emission_chunks, coefficients, timescales, time_step=0.01, t0=None):
+    """Compute the temperature change by numerical integration (trapezoidal rule)
+    of the emissions against an ARTP expressed as a sum of exponential modes
+    (see `get_atp_modes` in `metrics.slp` and `metrics.co2`).
+
+    Each mode is advanced with a first-order recursive filter, so the emissions
+    can be streamed in chunks of any length with constant memory per mode.
+    The results are identical, to floating-point tolerance, to those of
+    `compute_temperature_response` with the ARTP sampled at
+    t0, t0 + time_step, t0 + 2 * time_step, ...
+
+    Parameters
+    ----------
+    emission_chunks: iterable of array-like
+        Consecutive chunks of emission values.
+
+    coefficients: array-like of shape (n_modes, ...)
+        Coefficients of the exponential modes of the ARTP.
+        Trailing dimensions (e.g. response regions) are kept.
+
+    timescales: array-like of shape (n_modes,)
+        Timescales (yr) of the exponential modes.
+        Use `np.inf` for a constant mode.
+
+    time_step: float (default=0.01)
+        Length in years of the time step used
+        for numerical integration.
+
+    t0: float or None (default=None)
+        Time (yr) of the first ARTP sample.
+        If None, it is equal to `time_step`.
+
+    Yields
+    ------
+    temperature: ndarray of shape (chunk length, ...)
+        Temperature change at each time step of the chunk.
+    """
+
+    if t0 is None:
+        t0 = time_step
+
+    coefficients = np.asarray(coefficients, dtype=float)
+    timescales = np.asarray(timescales, dtype=float)
+    n_modes = len(timescales)
+
+    # Decay of each mode over one time step
+    decay = np.exp(-time_step / timescales)
+
+    # Weights of the modes in the trapezoidal rule
+    expand = (slice(None),) + (np.newaxis,) * (coefficients.ndim - 1)
+    first_weights = coefficients * (time_step / 2 * np.exp(-t0 / timescales))[expand]
+    weights = first_weights * (1 + decay)[expand]
+
+    # Sum of the past emissions weighted by the decay of each mode
+    state = np.zeros(n_modes)
+    is_first_chunk = True
+
+    for chunk in emission_chunks:
+        chunk = np.atleast_1d(np.asarray(chunk, dtype=float))
+
+        if len(chunk) == 0:
+            continue
+
+        mode_sums = np.empty((len(chunk), n_modes))
+        for m in range(n_modes):
+            filtered, _ = signal.lfilter([1.], [1., -decay[m]], chunk, zi=[decay[m] * state[m]])
+            mode_sums[0, m] = state[m]
+            mode_sums[1:, m] = filtered[:-1]
+            state[m] = filtered[-1]
+
+        temperature = np.tensordot(mode_sums, weights, axes=([1], [0]))
+
+        if is_first_chunk:
+            temperature[0] = chunk[0] * np.sum(first_weights, axis=0)
+            is_first_chunk = False
+
+        yield temperature
+
+
+def compute_modal_temperature(emissions, coefficients, timescales, time_step=0.01, t0=None, chunk_size=100000):
+    """Compute the temperature change at each time step from an ARTP
+    expressed as a sum of exponential modes (see `iter_modal_temperature`).
+
+    Parameters
+    ----------
+    emissions: array-like
+        Array of emission values.
+
+    coefficients: array-like of shape (n_modes, ...)
+        Coefficients of the exponential modes of the ARTP.
+
+    timescales: array-like of shape (n_modes,)
+        Timescales (yr) of the exponential modes.
+
+    time_step: float (default=0.01)
+        Length in years of the time step used
+        for numerical integration.
+
+    t0: float or None (default=None)
+        Time (yr) of the first ARTP sample.
+        If None, it is equal to `time_step`.
+
+    chunk_size: int (default=100000)
+        Number of time steps processed at once.
+
+    Returns
+    -------
+    temperature: ndarray of shape (len(emissions), ...)
+        Temperature change at each time step.
+    """
+
+    emissions = np.asarray(emissions, dtype=float)
+    chunks = (emissions[i:i + chunk_size] for i in range(0, len(emissions), chunk_size))
+
+    temperature = list(iter_modal_temperature(chunks, coefficients, timescales, time_step, t0))
+
+    if not temperature:
+        return np.zeros((0,) + np.shape(coefficients)[1:])
+
+    return np.concatenate(temperature)
+
+
 def compute_mixed_scenarios_temperature(
-        pollutant, emiss_region, magnitudes, emiss_scenarios, time_horizons, artp, time_step=0.01
+        pollutant, emiss_region, magnitudes, emiss_scenarios, time_horizons, artp, time_step=0.01, method='auto'
 ):
     """Compute the temperature change due to variations of `pollutant' emissions.
     There can be any number of emission scenarios and each of them needs to have magnitude,
@@ -98,10 +281,14 @@ def compute_mixed_scenarios_temperature(
         Should be smaller than the lifetime of the
         used pollutant.
 
+    method: str (default='auto')
+        Method used to compute the temperature response
+        (see `compute_temperature_response`).
+
     Returns
     -------
-    mixed_scenario_temperature: list of floats
-        List of temperature changes for each point in
+    mixed_scenario_temperature: ndarray
+        Temperature changes for each point in
         the period considered.
         Length = max(time_horizons) * (1 / time_step)
     """
@@ -164,26 +351,25 @@ def compute_mixed_scenarios_temperature(
             prev_scen_emiss = sign * tot_delta_emiss_mass * (magnitudes[i-1] - 100) / 100
             scen_emiss = sign * tot_delta_emiss_mass * (magnitudes[i] - magnitudes[i-1]) / 100
 
+        t = np.arange(prev_th, curr_th)
+
         if emiss_scenarios[i] == 'linear':
-            for t in range(prev_th, curr_th):
-                mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss * ((t - prev_th + 1.) / (curr_th - prev_th))
+            mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss * ((t - prev_th + 1.) / (curr_th - prev_th))
 
         if emiss_scenarios[i] == 'sustained':
-            for t in range(prev_th, curr_th):
-                mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss
+            mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss
 
         if emiss_scenarios[i] == 'quadratic':
-            for t in range(prev_th, curr_th):
-                mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss * ((t - prev_th + 1.) / (curr_th - prev_th)) ** 2
+            mixed_scen_emiss[t] = prev_scen_emiss + scen_emiss * ((t - prev_th + 1.) / (curr_th - prev_th)) ** 2
 
-    mixed_scenario_temperature = []
-    for t in range(0, max_th * n_steps):
-        mixed_scenario_temperature.append(compute_time_step_temperature(t, mixed_scen_emiss, artp, time_step))
+    mixed_scenario_temperature = compute_temperature_response(mixed_scen_emiss, artp, time_step, method)
 
     return mixed_scenario_temperature
 
 
-def compute_scenarios_temperature(pollutant, emiss_region, magnitude, time_horizon, artp, time_step=0.01):
+def compute_scenarios_temperature(
+        pollutant, emiss_region, magnitude, time_horizon, artp, time_step=0.01, method='auto'
+):
 
     # Compute number of steps per year
     n_steps = int(1 / time_step)
@@ -202,26 +388,17 @@ def compute_scenarios_temperature(pollutant, emiss_region, magnitude, time_horiz
     else:
         scaled_delta_emiss_mass = delta_emiss_mass * (magnitude - 100) / 100
 
-    linear_scen_emiss = []
-    quadratic_scen_emiss = []
-    sin_scen_emiss = []
-    sustained_scen_emiss = []
-    for t in np.linspace(time_step, time_horizon, time_horizon * n_steps):
-        linear_scen_emiss.append(scaled_delta_emiss_mass * ((t + 1) / time_horizon))
-        quadratic_scen_emiss.append(scaled_delta_emiss_mass * ((t + 1) / time_horizon) ** 2)
-        sin_scen_emiss.append(scaled_delta_emiss_mass * np.sin(np.pi * ((t + 1) / time_horizon)))
-        sustained_scen_emiss.append(scaled_delta_emiss_mass)
+    t = np.linspace(time_step, time_horizon, time_horizon * n_steps)
+    linear_scen_emiss = scaled_delta_emiss_mass * ((t + 1) / time_horizon)
+    quadratic_scen_emiss = scaled_delta_emiss_mass * ((t + 1) / time_horizon) ** 2
+    sin_scen_emiss = scaled_delta_emiss_mass * np.sin(np.pi * ((t + 1) / time_horizon))
+    sustained_scen_emiss = np.full(time_horizon * n_steps, scaled_delta_emiss_mass)
 
     temperature = dict()
-    temperature['linear'] = np.zeros(time_horizon * n_steps)
-    temperature['quadratic'] = np.zeros(time_horizon * n_steps)
-    temperature['sin'] = np.zeros(time_horizon * n_steps)
-    temperature['sustained'] = np.zeros(time_horizon * n_steps)
+    temperature['linear'] = compute_temperature_response(linear_scen_emiss, artp, time_step, method)
+    temperature['quadratic'] = compute_temperature_response(quadratic_scen_emiss, artp, time_step, method)
+    temperature['sin'] = compute_temperature_response(sin_scen_emiss, artp, time_step, method)
+    temperature['sustained'] = compute_temperature_response(sustained_scen_emiss, artp, time_step, method)
     temperature['mixed'] = np.zeros(time_horizon * n_steps)
-    for t in range(0, time_horizon * n_steps):
-        temperature['linear'][t] = compute_time_step_temperature(t, linear_scen_emiss, artp, time_step)
-        temperature['quadratic'][t] = compute_time_step_temperature(t, quadratic_scen_emiss, artp, time_step)
-        temperature['sin'][t] = compute_time_step_temperature(t, sin_scen_emiss, artp, time_step)
-        temperature['sustained'][t] = compute_time_step_temperature(t, sustained_scen_emiss, artp, time_step)
 
     return temperature
@@ -0,0 +1,387 @@
+# Standard library imports
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingUnixStreamServer
+from urllib.parse import urlparse, parse_qs
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from metrics import slp, co2
+from scenarios import temperature_scenarios
+from simulations import input_selection, loading, regions, variables
+from uncertainties import propagation
+from utils import constants
+
+# Default address of the service
+HOST = "127.0.0.1"
+PORT = 8050
+
+# Maximum number of results kept in memory
+MAX_CACHED_RESULTS = 1024
+
+# Length in years of the time step used for the scenario temperatures
+SCENARIO_TIME_STEP = 0.01
+
+# Query fields given as comma separated lists in GET requests
+LIST_FIELDS = ['response_regions', 'time_horizons', 'metrics', 'scenarios', 'magnitudes']
+
+# Query fields converted to numbers in GET requests
+NUMBER_FIELDS = ['time_horizons', 'magnitudes']
+
+# Least recently used cache of the results and lock protecting it
+_RESULTS = OrderedDict()
+_RESULTS_LOCK = threading.Lock()
+
+# Futures of the queries being computed
+_IN_FLIGHT = dict()
+
+
+def _to_json(values):
+    """Convert an array to nested lists, replacing NaN values with None."""
+
+    values = np.asarray(values, dtype=float)
+    nan_mask = np.isnan(values)
+
+    values = values.astype(object)
+    values[nan_mask] = None
+
+    return values.tolist()
+
+
+def compute_potentials_result(query):
+    """Compute the potentials and their uncertainties for a resolved query.
+
+    Parameters
+    ----------
+    query: input_selection.ResolvedQuery
+        Resolved query.
+
+    Returns
+    -------
+    result: dict
+        JSON serialisable dictionary with the potentials and their propagated
+        uncertainties, each as a (time horizon x response region) nested list.
+    """
+
+    pollutant = query.pollutant
+
+    _, _, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a = variables.get_regional_response(
+        pollutant, query.emission_region, query.response_regions
+    )
+
+    if pollutant == 'CO2':
+        potentials = co2.compute_potentials(
+            rr_rad_eff, rad_eff, rad_eff_a, query.time_horizons, rr_precip_avg, precip_avg
+        )
+    else:
+        potentials = slp.compute_potentials(
+            pollutant, rr_rad_eff, rad_eff, rad_eff_a, query.time_horizons, rr_precip_avg, precip_avg
+        )
+
+    context = propagation.get_uncertainty_context(pollutant, query.emission_region, query.response_regions)
+    artp_std, arpp_std = propagation.apply_uncertainty_context(
+        context, potentials.artp, potentials.slow_arpp, potentials.fast_arpp
+    )
+    iartp_std, iarpp_std = propagation.apply_uncertainty_context(
+        context, potentials.iartp, potentials.slow_iarpp, potentials.fast_iarpp
+    )
+
+    values = {
+        'ARTP': (potentials.artp, artp_std),
+        'ARPP': (potentials.arpp, arpp_std),
+        'iARTP': (potentials.iartp, iartp_std),
+        'iARPP': (potentials.iarpp, iarpp_std)
+    }
+
+    return {
+        'pollutant': pollutant,
+        'emission_region': query.emission_region,
+        'response_regions': query.response_regions,
+        'time_horizons': _to_json(query.time_horizons),
+        'potentials': {metric: _to_json(values[metric][0]) for metric in query.metrics},
+        'std': {metric: _to_json(values[metric][1]) for metric in query.metrics}
+    }
+
+
+def compute_scenarios_result(query):
+    """Compute the temperature response to a sequence of emission scenarios
+    for a resolved query, with one time horizon per scenario.
+
+    Parameters
+    ----------
+    query: input_selection.ResolvedQuery
+        Resolved query.
+
+    Returns
+    -------
+    result: dict
+        JSON serialisable dictionary with the temperature response
+        and its uncertainty in each response region, at each time step.
+    """
+
+    pollutant = query.pollutant
+    time_horizons = [int(th) for th in query.time_horizons]
+
+    assert len(query.scenarios) > 0, "at least one scenario is required"
+    assert time_horizons == sorted(time_horizons), "the time horizons must be increasing"
+
+    _, _, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a = variables.get_regional_response(
+        pollutant, query.emission_region, query.response_regions
+    )
+
+    # Compute the potentials at each time step
+    n_steps = int(1 / SCENARIO_TIME_STEP)
+    t = np.linspace(SCENARIO_TIME_STEP, time_horizons[-1], time_horizons[-1] * n_steps)
+
+    if pollutant == 'CO2':
+        potentials = co2.compute_potentials(rr_rad_eff, rad_eff, rad_eff_a, t, rr_precip_avg, precip_avg)
+    else:
+        potentials = slp.compute_potentials(pollutant, rr_rad_eff, rad_eff, rad_eff_a, t, rr_precip_avg, precip_avg)
+
+    context = propagation.get_uncertainty_context(pollutant, query.emission_region, query.response_regions)
+
+    temperature = dict()
+    std = dict()
+
+    for i, region in enumerate(query.response_regions):
+        temp_response = temperature_scenarios.compute_mixed_scenarios_temperature(
+            pollutant, query.emission_region, query.magnitudes, query.scenarios,
+            time_horizons, potentials.artp[:, i], SCENARIO_TIME_STEP
+        )
+        temp_std = np.abs(temp_response) * context.artp_rel_std[i]
+
+        temperature[region] = _to_json(temp_response)
+        std[region] = _to_json(temp_std)
+
+    return {
+        'pollutant': pollutant,
+        'emission_region': query.emission_region,
+        'scenarios': query.scenarios,
+        'magnitudes': query.magnitudes,
+        'time_horizons': time_horizons,
+        'time_step': SCENARIO_TIME_STEP,
+        'temperature': temperature,
+        'std': std
+    }
+
+
+# Functions computing the result of each kind of query
+QUERY_KINDS = {
+    'potentials': compute_potentials_result,
+    'scenarios': compute_scenarios_result
+}
+
+
+def _get_query_key(kind, query):
+    """Get a hashable key identifying a resolved query."""
+
+    return (
+        kind, query.pollutant, query.emission_region, tuple(query.response_regions),
+        tuple(query.time_horizons.tolist()), tuple(query.metrics), tuple(query.scenarios),
+        tuple(query.magnitudes)
+    )
+
+
+def handle_query(kind, query):
+    """Get the result of a query.
+
+    Results are kept in a bounded least recently used cache and
+    identical queries received while a result is being computed
+    wait for that computation instead of starting a new one.
+
+    Parameters
+    ----------
+    kind: str
+        One of the keys of `QUERY_KINDS`.
+
+    query: dict or input_selection.Query
+        Query to answer (see `input_selection.resolve_query`).
+
+    Returns
+    -------
+    result: dict
+        JSON serialisable result of the query.
+    """
+
+    assert kind in QUERY_KINDS, "{} is not an available query kind".format(kind)
+
+    resolved_query = input_selection.resolve_queries([query])[0]
+    key = _get_query_key(kind, resolved_query)
+
+    with _RESULTS_LOCK:
+        if key in _RESULTS:
+            _RESULTS.move_to_end(key)
+            return _RESULTS[key]
+
+        future = _IN_FLIGHT.get(key)
+        owner = future is None
+
+        if owner:
+            future = Future()
+            _IN_FLIGHT[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        result = QUERY_KINDS[kind](resolved_query)
+    except Exception as error:
+        with _RESULTS_LOCK:
+            del _IN_FLIGHT[key]
+
+        future.set_exception(error)
+        raise
+
+    with _RESULTS_LOCK:
+        del _IN_FLIGHT[key]
+        _RESULTS[key] = result
+
+        if len(_RESULTS) > MAX_CACHED_RESULTS:
+            _RESULTS.popitem(last=False)
+
+    future.set_result(result)
+
+    return result
+
+
+def preload():
+    """Load the grid, the region masks, the ERF tables, the emissions
+    and the regional responses and uncertainties of all experiments."""
+
+    loading.load_grid_areas()
+    regions.get_region_masks()
+    input_selection.load_erf_table()
+
+    response_regions = input_selection.get_response_regions()
+
+    experiments = (
+        [('SO2', region) for region in constants.SO2_EMISS_REGIONS] +
+        [('BC', region) for region in constants.BC_EMISS_REGIONS] +
+        [('CO2', 'Global'), ('CH4', 'Global')]
+    )
+
+    for pollutant, emission_region in experiments:
+        variables.get_regional_response(pollutant, emission_region, response_regions)
+        propagation.get_uncertainty_context(pollutant, emission_region, response_regions)
+
+
+def _parse_query_string(query_string):
+    """Convert the parameters of a GET request to a query dictionary."""
+
+    query = dict()
+
+    for field, values in parse_qs(query_string).items():
+        value = values[-1]
+
+        if field in LIST_FIELDS:
+            value = [item for item in value.split(',') if item]
+
+            if field in NUMBER_FIELDS:
+                value = [float(item) for item in value]
+
+        query[field] = value
+
+    return query
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answer `QUERY_KINDS` queries given as GET parameters or POST JSON bodies."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path == '/health':
+            self._send_json(200, {'status': 'ok', 'cached_results': len(_RESULTS)})
+        else:
+            self._answer(url.path, _parse_query_string(url.query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+
+        try:
+            query = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'the request body is not valid JSON'})
+            return
+
+        if not isinstance(query, dict):
+            self._send_json(400, {'error': 'the request body must be a JSON object'})
+            return
+
+        self._answer(urlparse(self.path).path, query)
+
+    def _answer(self, path, query):
+        kind = path.strip('/')
+
+        if kind not in QUERY_KINDS:
+            self._send_json(404, {'error': 'unknown path {}'.format(path)})
+            return
+
+        try:
+            result = handle_query(kind, query)
+        except (AssertionError, KeyError, TypeError, ValueError) as error:
+            self._send_json(400, {'error': str(error)})
+        except Exception as error:
+            self._send_json(500, {'error': str(error)})
+        else:
+            self._send_json(200, result)
+
+    def _send_json(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requests are not logged (Unix socket clients have no address)
+        pass
+
+
+def run_server(host=HOST, port=PORT, socket_path=None, preload_data=True):
+    """Run the metrics service until interrupted.
+
+    Parameters
+    ----------
+    host: str (default=HOST)
+        Host name of the HTTP server.
+
+    port: int (default=PORT)
+        Port of the HTTP server.
+
+    socket_path: str or None (default=None)
+        If specified, listen on a Unix socket at this
+        path instead of `host` and `port`.
+
+    preload_data: boolean (default=True)
+        If True, preload all data before accepting queries.
+    """
+
+    if preload_data:
+        preload()
+
+    if socket_path is None:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+        print("Serving metrics on http://{}:{}".format(host, port))
+    else:
+        server = ThreadingUnixStreamServer(socket_path, QueryHandler)
+        server.daemon_threads = True
+        print("Serving metrics on {}".format(socket_path))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    run_server()
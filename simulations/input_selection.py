@@ -1,5 +1,7 @@
 # Standard library imports
 import os
+from collections import namedtuple
+from functools import lru_cache
 
 # Third party imports
 import json
@@ -7,9 +9,12 @@ import numpy as np
 
 # Local application imports
 from utils import constants
+from simulations import store
 
 # Local paths
 PDRMIP_PATH = "data/pdrmip/"
+ERF_T_PATH = os.path.join(PDRMIP_PATH, "PDRMIP_mean_dERFt.json")
+ERF_A_PATH = os.path.join(PDRMIP_PATH, "PDRMIP_mean_dERFa.json")
 
 # Response regions dictionary
 RESPONSE_REGION_OPTIONS = {
@@ -35,6 +40,182 @@ SCENARIO_OPTIONS = {
     3: 'quadratic'
 }
 
+# Effective radiative forcing of the SO2 emission regions (from HadGEM3 simulations),
+# in the same order as `constants.SO2_EMISS_REGIONS`
+SO2_ERF_T = [0.906, 0.232, np.nan, 0.166, 0.101, 0.275]
+
+# PDRMIP experiments of the BC emission regions
+BC_EXPERIMENTS = {
+    'Global': '10xBC_',
+    'Asia': '10xBCAsia'
+}
+
+# PDRMIP experiments of the pollutants with a global effective radiative forcing
+GLOBAL_EXPERIMENTS = {
+    'CO2': '2xCO2',
+    'CH4': '3xCH4'
+}
+
+# Available potentials
+METRICS = ['ARTP', 'ARPP', 'iARTP', 'iARPP']
+
+# Effective radiative forcing of the PDRMIP models (rows) and experiments (columns)
+ERFTable = namedtuple('ERFTable', ['models', 'experiments', 'erf_t', 'erf_a'])
+
+# Declarative request of potentials and emission scenarios
+Query = namedtuple(
+    'Query',
+    ['pollutant', 'emission_region', 'response_regions', 'time_horizons', 'metrics', 'scenarios', 'magnitudes']
+)
+Query.__new__.__defaults__ = (None, ('All regions',), (constants.H1,), tuple(METRICS), (), ())
+
+# Query with validated values, response region names and effective radiative forcing
+ResolvedQuery = namedtuple(
+    'ResolvedQuery',
+    [
+        'pollutant', 'emission_region', 'response_regions', 'time_horizons',
+        'metrics', 'scenarios', 'magnitudes', 'erf_t', 'erf_a'
+    ]
+)
+
+
+def read_erf_table():
+    """Read the PDRMIP mean effective radiative
+    forcing differences from the JSON files."""
+
+    with open(ERF_T_PATH) as f:
+        mean_delta_erf_t = json.load(f)
+    with open(ERF_A_PATH) as f:
+        mean_delta_erf_a = json.load(f)
+
+    models = list(mean_delta_erf_t.keys())
+    models += [model for model in mean_delta_erf_a.keys() if model not in models]
+
+    experiments = []
+    for mean_delta_erf in [mean_delta_erf_t, mean_delta_erf_a]:
+        for model_erf in mean_delta_erf.values():
+            experiments += [experiment for experiment in model_erf.keys() if experiment not in experiments]
+
+    tables = []
+    for mean_delta_erf in [mean_delta_erf_t, mean_delta_erf_a]:
+        table = np.full((len(models), len(experiments)), np.nan)
+
+        for i, model in enumerate(models):
+            for experiment, value in mean_delta_erf.get(model, dict()).items():
+                table[i, experiments.index(experiment)] = value
+
+        tables.append(table)
+
+    return ERFTable(tuple(models), tuple(experiments), tables[0], tables[1])
+
+
+@lru_cache(maxsize=None)
+def load_erf_table():
+    """Load the PDRMIP mean effective radiative forcing differences.
+
+    The tables are memory-mapped from the data store, if packed,
+    or the JSON files are parsed once per process.
+
+    Returns
+    -------
+    erf_table: ERFTable
+        Named tuple with the names of the models and experiments
+        and two read-only arrays of shape (n_models, n_experiments)
+        with the total (`erf_t`) and atmospheric (`erf_a`) effective
+        radiative forcing differences (NaN where not available).
+    """
+
+    stored_table = [store.load_metadata('erf_models'), store.load_metadata('erf_experiments')]
+    stored_table += [store.load_array('erf_t'), store.load_array('erf_a')]
+
+    if all(values is not None for values in stored_table):
+        models, experiments, erf_t, erf_a = stored_table
+
+        return ERFTable(tuple(models), tuple(experiments), erf_t, erf_a)
+
+    models, experiments, erf_t, erf_a = read_erf_table()
+
+    erf_t.flags.writeable = False
+    erf_a.flags.writeable = False
+
+    return ERFTable(models, experiments, erf_t, erf_a)
+
+
+def get_experiment_erf(experiment):
+    """Get the multi-model mean effective radiative forcing
+    differences of the PDRMIP `experiment`.
+
+    Returns
+    -------
+    erf_t: float
+        Average difference in the effective radiative forcing.
+
+    erf_a: float
+        Average difference in the atmospheric component
+        of the effective radiative forcing.
+    """
+
+    erf_table = load_erf_table()
+
+    assert experiment in erf_table.experiments, "{} is not an available experiment".format(experiment)
+
+    j = erf_table.experiments.index(experiment)
+
+    return np.nanmean(erf_table.erf_t[:, j]), np.nanmean(erf_table.erf_a[:, j])
+
+
+@lru_cache(maxsize=None)
+def get_emission_region_erf(pollutant, region):
+    """Get the effective radiative forcing of an emission region without prompting.
+
+    Parameters
+    ----------
+    pollutant: str
+        Name of pollutant. Can be any of the following:
+        'SO2', 'BC', 'CO2', 'CH4'.
+
+    region: str
+        The name of emission region.
+        For SO2, one of `constants.SO2_EMISS_REGIONS`.
+        For BC, one of `constants.BC_EMISS_REGIONS`.
+        For CO2 and CH4, the effective radiative forcing
+        is independent of the emission region.
+
+    Returns
+    -------
+    region_erf_t: float
+         Average difference in the effective radiative forcing
+         between the perturbed and the control experiment
+         for the selected emission region.
+
+    region_erf_a: float
+         Average difference in the atmospheric component of the
+         effective radiative forcing between the perturbed and
+         the control experiment for the selected emission region.
+    """
+
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    if pollutant == 'SO2':
+        assert region in constants.SO2_EMISS_REGIONS, \
+            "region for {} must be one of {}".format(pollutant, constants.SO2_EMISS_REGIONS)
+
+        fp = -0.4  # Kvalevag et al. (2013) used by Shine et al. (2015)
+        region_erf_t = SO2_ERF_T[constants.SO2_EMISS_REGIONS.index(region)]
+        region_erf_a = region_erf_t * fp
+
+    elif pollutant == 'BC':
+        assert region in constants.BC_EMISS_REGIONS, \
+            "region for {} must be one of {}".format(pollutant, constants.BC_EMISS_REGIONS)
+
+        region_erf_t, region_erf_a = get_experiment_erf(BC_EXPERIMENTS[region])
+
+    # The effective radiative forcing is independent of the emission region for CO2 and CH4
+    else:
+        region_erf_t, region_erf_a = get_experiment_erf(GLOBAL_EXPERIMENTS[pollutant])
+
+    return region_erf_t, region_erf_a
+
 
 def select_emission_region(pollutant, region=None):
     """Select emission region and returns corresponding effective radiative forcing.
@@ -81,11 +262,6 @@ def select_emission_region(pollutant, region=None):
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
 
-    with open(os.path.join(PDRMIP_PATH, "PDRMIP_mean_dERFt.json")) as f:
-        mean_delta_erf_t = json.load(f)
-    with open(os.path.join(PDRMIP_PATH, "PDRMIP_mean_dERFa.json")) as f:
-        mean_delta_erf_a = json.load(f)
-
     emission_region_options = {
         1: 'NHML',
         2: 'US',
@@ -100,34 +276,6 @@ def select_emission_region(pollutant, region=None):
         2: 'Asia'
     }
 
-    if pollutant == 'SO2':
-        erf_t = [0.906, 0.232, np.nan, 0.166, 0.101, 0.275]  # from HadGEM3 simulations
-        fp = -0.4  # Kvalevag et al. (2013) used by Shine et al. (2015)
-        erf_a = [i * fp for i in erf_t]
-
-    elif pollutant == 'BC':
-        erf_t = [
-            np.mean([mean_delta_erf_t[k]['10xBC_'] for k, v in mean_delta_erf_t.items()
-                     if '10xBC_' in mean_delta_erf_t[k].keys()]),
-            np.mean([mean_delta_erf_t[k]['10xBCAsia'] for k, v in mean_delta_erf_t.items()
-                     if '10xBCAsia' in mean_delta_erf_t[k].keys()])
-        ]
-        erf_a = [
-            np.mean([mean_delta_erf_a[k]['10xBC_'] for k, v in mean_delta_erf_a.items()
-                     if '10xBC_' in mean_delta_erf_a[k].keys()]),
-            np.mean([mean_delta_erf_a[k]['10xBCAsia'] for k, v in mean_delta_erf_a.items()
-                     if '10xBCAsia' in mean_delta_erf_a[k].keys()])
-        ]
-
-    # The effective radiative forcing is independent of the emission region for CO2 and CH4
-    elif pollutant == 'CO2':
-        erf_t = np.mean([mean_delta_erf_t[k]['2xCO2'] for k, v in mean_delta_erf_t.items()])
-        erf_a = np.mean([mean_delta_erf_a[k]['2xCO2'] for k, v in mean_delta_erf_a.items()])
-
-    elif pollutant == 'CH4':
-        erf_t = np.mean([mean_delta_erf_t[k]['3xCH4'] for k, v in mean_delta_erf_t.items()])
-        erf_a = np.mean([mean_delta_erf_a[k]['3xCH4'] for k, v in mean_delta_erf_a.items()])
-
     emission_region = 0
     if pollutant == 'SO2':
         if region is None:
@@ -149,21 +297,11 @@ def select_emission_region(pollutant, region=None):
                     print("\nTHE SELECTION IS NOT VALID, PLEASE ENTER AN INTEGER")
 
             region_name = emission_region_options[emission_region]
-            region_erf_t = erf_t[emission_region - 1]
-            region_erf_a = erf_a[emission_region - 1]
 
             print(emission_region_options[emission_region])
 
         else:
-            assert region in constants.SO2_EMISS_REGIONS, \
-                "region for {} must be one of {}".format(pollutant, constants.SO2_EMISS_REGIONS)
-
             region_name = region
-            region_id = next(k for k, v in emission_region_options.items() if v == region_name)
-            region_erf_t = erf_t[region_id - 1]
-            region_erf_a = erf_a[region_id - 1]
-
-        return region_name, region_erf_t, region_erf_a
 
     elif pollutant == 'BC':
         if region is None:
@@ -182,21 +320,11 @@ def select_emission_region(pollutant, region=None):
                     print("\nTHE SELECTION IS NOT VALID, PLEASE ENTER AN INTEGER")
 
             region_name = bc_emission_region_options[emission_region]
-            region_erf_t = erf_t[emission_region - 1]
-            region_erf_a = erf_a[emission_region - 1]
 
             print(bc_emission_region_options[emission_region])
 
         else:
-            assert region in constants.BC_EMISS_REGIONS, \
-                "region for {} must be one of {}".format(pollutant, constants.BC_EMISS_REGIONS)
-
             region_name = region
-            region_id = next(k for k, v in bc_emission_region_options.items() if v == region_name)
-            region_erf_t = erf_t[region_id - 1]
-            region_erf_a = erf_a[region_id - 1]
-
-        return region_name, region_erf_t, region_erf_a
 
     else:
         if region is None:
@@ -206,10 +334,9 @@ def select_emission_region(pollutant, region=None):
         else:
             region_name = region
 
-        region_erf_t = erf_t
-        region_erf_a = erf_a
+    region_erf_t, region_erf_a = get_emission_region_erf(pollutant, region_name)
 
-        return region_name, region_erf_t, region_erf_a
+    return region_name, region_erf_t, region_erf_a
 
 
 def select_response_region(region_id=None):
@@ -474,3 +601,127 @@ def select_scenarios():
 
             return ths, [scen[i] for i in scenarios], magnitude
 
+
+def _resolve_response_regions(response_regions):
+    """Get the names of the response regions from names or `RESPONSE_REGION_OPTIONS` integers."""
+
+    if isinstance(response_regions, (str, int)):
+        response_regions = [response_regions]
+
+    region_names = []
+
+    for region in response_regions:
+        if isinstance(region, (int, np.integer)):
+            assert region in RESPONSE_REGION_OPTIONS, "{} is not an available response region".format(region)
+            region = RESPONSE_REGION_OPTIONS[region]
+
+        if region.lower() == 'all regions':
+            return get_response_regions()
+
+        assert region in get_response_regions(), "{} is not an available response region".format(region)
+        region_names.append(region)
+
+    return region_names
+
+
+def resolve_query(query):
+    """Validate a query and resolve it without prompting.
+
+    Parameters
+    ----------
+    query: Query
+        Named tuple with the following fields:
+
+        pollutant: str
+            One of `constants.POLLUTANTS`.
+
+        emission_region: str or None (default=None)
+            Name of the emission region. Can be None
+            only for CO2 and CH4 (Global is used).
+
+        response_regions: str, int or list (default=('All regions',))
+            Names or `RESPONSE_REGION_OPTIONS` integers of the response regions.
+
+        time_horizons: int, float or list (default=(constants.H1,))
+            Time horizons (yr).
+
+        metrics: list of str (default=METRICS)
+            Potentials to compute, any of `METRICS`.
+
+        scenarios: list of str (default=())
+            Emission scenarios, any of `constants.SCENARIOS`.
+
+        magnitudes: list of floats (default=())
+            Emission changes (percentage of current emission,
+            between 0 and 1000), one for each scenario.
+
+    Returns
+    -------
+    resolved_query: ResolvedQuery
+        Named tuple with the validated query values, the names of the
+        response regions, the time horizons as an array and the
+        effective radiative forcing of the emission region.
+    """
+
+    pollutant = query.pollutant
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    emission_region = query.emission_region
+    if emission_region is None:
+        assert pollutant in GLOBAL_EXPERIMENTS, "an emission region is required for {}".format(pollutant)
+        emission_region = 'Global'
+
+    erf_t, erf_a = get_emission_region_erf(pollutant, emission_region)
+
+    time_horizons = np.atleast_1d(np.asarray(query.time_horizons, dtype=float))
+    assert np.all(time_horizons > 0), "time horizons must be positive"
+
+    metrics = list(query.metrics)
+    for metric in metrics:
+        assert metric in METRICS, "{} is not an available metric".format(metric)
+
+    scenarios = list(query.scenarios)
+    for scenario in scenarios:
+        assert scenario in constants.SCENARIOS, "{} is not an available scenario".format(scenario)
+
+    magnitudes = list(query.magnitudes)
+    assert len(magnitudes) == len(scenarios), "a magnitude is required for each scenario"
+    for magnitude in magnitudes:
+        assert 0 <= magnitude <= 1000, "magnitudes must be between 0 and 1000"
+
+    return ResolvedQuery(
+        pollutant=pollutant,
+        emission_region=emission_region,
+        response_regions=_resolve_response_regions(query.response_regions),
+        time_horizons=time_horizons,
+        metrics=metrics,
+        scenarios=scenarios,
+        magnitudes=magnitudes,
+        erf_t=erf_t,
+        erf_a=erf_a
+    )
+
+
+def resolve_queries(queries):
+    """Resolve a batch of queries without prompting.
+
+    The PDRMIP effective radiative forcing files are parsed
+    once, whatever the number of queries.
+
+    Parameters
+    ----------
+    queries: iterable of Query or dict
+        Queries to resolve. Dictionaries are converted
+        to `Query` using their keys as field names.
+
+    Returns
+    -------
+    resolved_queries: list of ResolvedQuery
+        Resolved queries, in the same order as `queries`
+        (see `resolve_query`).
+    """
+
+    return [
+        resolve_query(Query(**query) if isinstance(query, dict) else query)
+        for query in queries
+    ]
@@ -1,17 +1,35 @@
 # Standard library imports
 import os
+import threading
+from functools import lru_cache, partial
 
 # Third party imports
 import numpy as np
-from netCDF4 import Dataset
-from scipy.io import readsav
 
 # Local application imports
 from utils import constants
-from simulations import regions
+from simulations import regions, store
 
 DATA_PATH = "data/"
 
+# Path of the AeroCom BC emissions
+BC_EMISSION_PATH = os.path.join(DATA_PATH, "pdrmip/emissions/regridded_aerocom_BC_emissions_2006.nc")
+
+# Path of the IDL file with the grid cell areas
+AREAS_PATH = os.path.join(DATA_PATH, "areas.sav")
+
+# Path of the optional binary copy of the grid cell areas
+AREAS_SIDECAR_PATH = os.path.join(DATA_PATH, "areas.npy")
+
+# Precipitation variables, converted to mm/day when loaded
+PRECIP_VARIABLES = ['precip']
+
+# Lock serialising the access to netCDF files (the netCDF/HDF5 libraries are not thread safe)
+NETCDF_LOCK = threading.Lock()
+
+# Cache of the emission mass differences of all emission regions
+_EMISSIONS_CACHE = dict()
+
 
 def get_file_paths(pollutant, emission_region):
     """Get the paths of the control and perturbation files for the
@@ -54,8 +72,7 @@ def get_file_paths(pollutant, emission_region):
 
     if pollutant == 'SO2':
         ctl_path = os.path.join(DATA_PATH, "so2/ctl_150year_avg.nc")
-        pert_file = os.listdir(os.path.join(DATA_PATH, "so2/No_SO2_{}/".format(emission_region)))[0]
-        pert_path = os.path.join(DATA_PATH, "so2/No_SO2_{}/".format(emission_region), pert_file)
+        pert_path = _get_so2_pert_path(emission_region)
     else:
         ctl_path = os.path.join(DATA_PATH, "pdrmip/regridded_files/base_mm_mean.nc")
 
@@ -73,16 +90,247 @@ def get_file_paths(pollutant, emission_region):
     return ctl_path, pert_path
 
 
-def load_grid_areas():
-    """Load the area of the grid cells."""
+@lru_cache(maxsize=None)
+def _get_so2_pert_path(emission_region):
+    """Get the path of the (only) file of the SO2 perturbation experiment of `emission_region`."""
+
+    pert_dir = os.path.join(DATA_PATH, "so2/No_SO2_{}/".format(emission_region))
+
+    return os.path.join(pert_dir, os.listdir(pert_dir)[0])
+
+
+def read_grid_areas():
+    """Read the area of the grid cells from the `.npy` sidecar,
+    if up to date, or from the IDL `areas.sav` file."""
 
-    areas2d = readsav(os.path.join(DATA_PATH, "areas.sav"))
-    areas = areas2d['areas2d']
+    if os.path.exists(AREAS_SIDECAR_PATH) and \
+            os.path.getmtime(AREAS_SIDECAR_PATH) >= os.path.getmtime(AREAS_PATH):
+        areas = np.load(AREAS_SIDECAR_PATH)
+    else:
+        from scipy.io import readsav
+
+        areas2d = readsav(AREAS_PATH)
+        areas = np.array(areas2d['areas2d'])
 
     return areas
 
 
-def load_climate_variables(pollutant, emission_region):
+@lru_cache(maxsize=None)
+def _read_grid_areas():
+    """Read the area of the grid cells from the data
+    store, if packed, or from the original files."""
+
+    areas = store.load_array('areas')
+
+    if areas is None:
+        areas = read_grid_areas()
+        areas.flags.writeable = False
+
+    return areas
+
+
+def load_grid_areas():
+    """Load the area of the grid cells.
+
+    The file is parsed once per process and
+    a read-only view of the areas is returned.
+    """
+
+    return _read_grid_areas().view()
+
+
+def save_grid_areas_sidecar():
+    """Save the area of the grid cells as a `.npy` file
+    that is read instead of `areas.sav` on cold start."""
+
+    np.save(AREAS_SIDECAR_PATH, _read_grid_areas())
+
+
+@lru_cache(maxsize=None)
+def get_total_area():
+    """Get the total area of the grid cells."""
+
+    return np.sum(_read_grid_areas())
+
+
+@lru_cache(maxsize=None)
+def _compute_region_areas():
+    """Compute the total area of all regions in `regions.REGION_NAMES`."""
+
+    region_areas = np.sum(regions.get_region_masks() * _read_grid_areas(), axis=(1, 2))
+    region_areas.flags.writeable = False
+
+    return region_areas
+
+
+def get_region_areas(region_names):
+    """Get the total area of the specified regions.
+
+    Parameters
+    ----------
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    region_areas: ndarray of shape (len(region_names),)
+        Total area of each region in `region_names`.
+    """
+
+    for region in region_names:
+        assert region in regions.REGION_BOUNDS, "{} is not an available region".format(region)
+
+    return _compute_region_areas()[[regions.REGION_NAMES.index(region) for region in region_names]]
+
+
+def read_variable(path, variable, bounding_box=None):
+    """Read a variable from a netCDF file, converting
+    precipitation variables to mm/day. If `bounding_box`
+    is specified (see `regions.get_bounding_box`), only
+    that latitude and longitude hyperslab is read."""
+
+    from netCDF4 import Dataset
+
+    index = (Ellipsis,) if bounding_box is None else (Ellipsis,) + tuple(bounding_box)
+
+    with NETCDF_LOCK:
+        data = Dataset(path, mode='r')
+
+        values = np.squeeze(data.variables[variable][index])
+
+        # If precipitation unit is kg/m2/s convert it to mm/day
+        if variable in PRECIP_VARIABLES and data.variables[variable].units != 'mm/day':
+            values = values * 86400
+
+        data.close()
+
+    return values
+
+
+@lru_cache(maxsize=64)
+def load_variable(path, variable):
+    """Load a variable from the data store, if packed, or from a netCDF file.
+
+    Loaded variables are kept in a least recently used cache keyed
+    on `path` and `variable`, so that files shared by many experiments
+    (e.g. the control runs) are only read and decoded once. Variables
+    in the data store are memory-mapped without decoding.
+
+    Parameters
+    ----------
+    path: str
+        Path of the netCDF file.
+
+    variable: str
+        Name of the variable.
+
+    Returns
+    -------
+    values: read-only ndarray
+        Squeezed values of the variable. Precipitation
+        variables are converted to mm/day.
+    """
+
+    values = store.load_array(store.get_variable_key(path, variable))
+
+    if values is None:
+        values = read_variable(path, variable)
+        values.flags.writeable = False
+
+    return values
+
+
+@lru_cache(maxsize=64)
+def _load_hyperslab(path, variable, lat_start, lat_stop, lon_start, lon_stop):
+    """Load a latitude and longitude hyperslab of a variable."""
+
+    bounding_box = slice(lat_start, lat_stop), slice(lon_start, lon_stop)
+
+    values = store.load_array(store.get_variable_key(path, variable))
+
+    if values is None:
+        values = read_variable(path, variable, bounding_box)
+        values.flags.writeable = False
+    else:
+        values = values[(Ellipsis,) + bounding_box]
+
+    return values
+
+
+def load_variable_hyperslab(path, variable, bounding_box):
+    """Load the latitude and longitude hyperslab `bounding_box` of a variable.
+
+    Only the hyperslab is read from the netCDF file (or from the memory-mapped
+    data store, if packed). Loaded hyperslabs are kept in a least recently
+    used cache.
+
+    Parameters
+    ----------
+    path: str
+        Path of the netCDF file.
+
+    variable: str
+        Name of the variable.
+
+    bounding_box: tuple of slices
+        Latitude and longitude slices of the hyperslab
+        (see `regions.get_bounding_box`).
+
+    Returns
+    -------
+    values: read-only ndarray
+        Squeezed values of the variable in the hyperslab.
+        Precipitation variables are converted to mm/day.
+    """
+
+    lat_slice, lon_slice = bounding_box
+
+    return _load_hyperslab(path, variable, lat_slice.start, lat_slice.stop, lon_slice.start, lon_slice.stop)
+
+
+def compute_global_mean(values):
+    """Compute the area-weighted global mean of a gridded
+    field (masked grid cells do not contribute to the mean)."""
+
+    return np.sum(np.ma.filled(values, 0) * load_grid_areas()) / get_total_area()
+
+
+@lru_cache(maxsize=None)
+def get_global_mean_difference(ctl_path, pert_path, variable):
+    """Get the area-weighted global mean of the difference of a
+    variable between perturbation and control experiments.
+
+    The mean is read from the data store, if packed, or computed
+    from the full grid once per process and cached. The mean of the
+    masked difference is used, rather than the difference of the two
+    means, so that grid cells masked in either file do not contribute.
+
+    Parameters
+    ----------
+    ctl_path: str
+        Path of the control netCDF file.
+
+    pert_path: str
+        Path of the perturbation netCDF file.
+
+    variable: str
+        Name of the variable.
+
+    Returns
+    -------
+    global_mean: float
+        Global mean of the difference (precipitation in mm/day).
+    """
+
+    global_mean = store.load_metadata(store.get_difference_key(ctl_path, pert_path, variable))
+
+    if global_mean is not None:
+        return global_mean
+
+    return compute_global_mean(load_variable(pert_path, variable) - load_variable(ctl_path, variable))
+
+
+def load_climate_variables(pollutant, emission_region, bounding_box=None):
     """Load temperature and precipitation and compute
     differences between perturbation and control experiments.
 
@@ -109,13 +357,19 @@ def load_climate_variables(pollutant, emission_region):
         - Global
         - Asia
 
+    bounding_box: tuple of slices or None (default=None)
+        If specified, only load the latitude and longitude
+        hyperslab of `regions.get_bounding_box`.
+
     Returns
     -------
     grid_delta_temp: ndarray of shape (145, 192)
-        Array with gridded temperature differences.
+        Array with gridded temperature differences
+        (restricted to `bounding_box`, if specified).
 
     grid_delta_precip: ndarray of shape (145, 192)
-        Array with gridded precipitation differences.
+        Array with gridded precipitation differences
+        (restricted to `bounding_box`, if specified).
     """
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
@@ -130,33 +384,134 @@ def load_climate_variables(pollutant, emission_region):
     # Get control and perturbation file paths
     ctl_path, pert_path = get_file_paths(pollutant, emission_region)
 
-    # Read netCDF files
-    ctl_data = Dataset(ctl_path, mode='r')
-    pert_data = Dataset(pert_path, mode='r')
+    # Get temperature and precipitation variables (precipitation in mm/day)
+    paths_variables = [(ctl_path, 'temp'), (ctl_path, 'precip'), (pert_path, 'temp'), (pert_path, 'precip')]
 
-    # Get temperature and precipitation variables
-    temp = np.squeeze(ctl_data.variables['temp'])
-    precip = np.squeeze(ctl_data.variables['precip'])
-    pert_temp = np.squeeze(pert_data.variables['temp'])
-    pert_precip = np.squeeze(pert_data.variables['precip'])
-
-    # If precipitation unit is kg/m2/s convert it to mm/day
-    if ctl_data.variables['precip'].units != 'mm/day':
-        precip = precip * 86400
-    if pert_data.variables['precip'].units != 'mm/day':
-        pert_precip = pert_precip * 86400
+    if bounding_box is None:
+        temp, precip, pert_temp, pert_precip = [
+            load_variable(path, variable) for path, variable in paths_variables
+        ]
+    else:
+        temp, precip, pert_temp, pert_precip = [
+            load_variable_hyperslab(path, variable, bounding_box) for path, variable in paths_variables
+        ]
 
     # Compute differences between perturbed and control run
     grid_delta_temp = pert_temp - temp
     grid_delta_precip = pert_precip - precip
 
-    # Close open datasets
-    ctl_data.close()
-    pert_data.close()
-
     return grid_delta_temp, grid_delta_precip
 
 
+def load_global_climate_variables(pollutant, emission_region):
+    """Get the global temperature and precipitation differences between
+    perturbation and control experiments from the cached global means
+    (see `get_global_mean_difference`), without loading the gridded fields again.
+
+    Returns
+    -------
+    temp_avg: float
+        Global temperature difference.
+
+    precip_avg: float
+        Global precipitation difference (mm/day).
+    """
+
+    ctl_path, pert_path = get_file_paths(pollutant, emission_region)
+
+    temp_avg = get_global_mean_difference(ctl_path, pert_path, 'temp')
+    precip_avg = get_global_mean_difference(ctl_path, pert_path, 'precip')
+
+    return temp_avg, precip_avg
+
+
+def _load_so2_ctl_emissions():
+    """Load the SO2 emissions (low and high level) of the control run."""
+
+    ctl_path, _ = get_file_paths('SO2', constants.SO2_EMISS_REGIONS[0])
+
+    ctl_so2_low = load_variable(ctl_path, 'field569')
+    ctl_so2_high = load_variable(ctl_path, 'field569_1')
+
+    return ctl_so2_low + ctl_so2_high
+
+
+def _compute_so2_emission_mass(ctl_so2, emission_region):
+    """Compute the SO2 emission mass (Tg/yr) difference for `emission_region`
+    given the control run SO2 emissions `ctl_so2`."""
+
+    # Get perturbation file path
+    _, pert_path = get_file_paths('SO2', emission_region)
+
+    # Load SO2 emissions
+    pert_so2_low = load_variable(pert_path, 'field569')
+    pert_so2_high = load_variable(pert_path, 'field569_1')
+    pert_so2 = pert_so2_low + pert_so2_high
+
+    # Convert emissions from kg/m2/s to Tg/yr and
+    # compute the mass released in each grid cell
+    delta_so2 = load_grid_areas() * 2 * (3600 * 24 * 365 * 1e-9) * (pert_so2 - ctl_so2)
+
+    # Compute the total emission mass
+    return np.ma.sum(np.ma.sum(delta_so2))
+
+
+def _compute_bc_emission_mass(bc_emissions, emission_region):
+    """Compute the BC emission mass (Tg/yr) difference for `emission_region`
+    given the AeroCom BC emissions `bc_emissions`."""
+
+    # Get the emission difference (the factor 9 is because the experiments are 10xBC) from the emission region
+    masked_delta_emissions = bc_emissions * regions.get_region_mask(emission_region) * 9
+
+    # Convert emissions from kg/m2/s to Tg/yr and
+    # compute the mass released in each grid cell
+    masked_delta_emiss_mass = load_grid_areas() * masked_delta_emissions * 3600 * 24 * 365 * 1e-9
+
+    # Compute the total emission mass
+    return np.ma.sum(np.ma.sum(masked_delta_emiss_mass))
+
+
+def load_all_emissions(pollutant):
+    """Get emissions for all emission regions of the specified pollutant.
+
+    The fields shared by all emission regions are read once and the
+    perturbation files are then processed in turn (the netCDF reads are
+    serialised by `NETCDF_LOCK`, so threads would not read them faster).
+    Results are cached for the process lifetime.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following two options:
+        - SO2
+        - BC
+
+    Returns
+    -------
+    delta_emiss_masses: dict
+        Emission mass (Tg/yr) difference of each emission region
+        in `constants.SO2_EMISS_REGIONS` or `constants.BC_EMISS_REGIONS`.
+    """
+
+    assert pollutant in ['SO2', 'BC'], "{} has no regional emissions".format(pollutant)
+
+    if pollutant not in _EMISSIONS_CACHE:
+
+        # Read the emissions shared by all emission regions once
+        if pollutant == 'SO2':
+            emission_regions = constants.SO2_EMISS_REGIONS
+            compute_emission_mass = partial(_compute_so2_emission_mass, _load_so2_ctl_emissions())
+        else:
+            emission_regions = constants.BC_EMISS_REGIONS
+            compute_emission_mass = partial(_compute_bc_emission_mass, load_variable(BC_EMISSION_PATH, 'emibc'))
+
+        delta_emiss_masses = [compute_emission_mass(emission_region) for emission_region in emission_regions]
+
+        _EMISSIONS_CACHE[pollutant] = dict(zip(emission_regions, delta_emiss_masses))
+
+    return dict(_EMISSIONS_CACHE[pollutant])
+
+
 def load_emissions(pollutant, emission_region):
     """Get emissions for the specified pollutant and emission_region.
 
@@ -191,53 +546,17 @@ def load_emissions(pollutant, emission_region):
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
 
-    # Load grid cell areas
-    areas = load_grid_areas()
-
     if pollutant == 'SO2':
-        # Get control and perturbation file paths
-        ctl_path, pert_path = get_file_paths(pollutant, emission_region)
-
-        # Read netCDF files
-        ctl_data = Dataset(ctl_path, mode='r')
-        pert_data = Dataset(pert_path, mode='r')
-
-        # Load SO2 emissions
-        ctl_so2_low = np.squeeze(ctl_data.variables['field569'])
-        ctl_so2_high = np.squeeze(ctl_data.variables['field569_1'])
-        ctl_so2 = ctl_so2_low + ctl_so2_high
-
-        pert_so2_low = np.squeeze(pert_data.variables['field569'])
-        pert_so2_high = np.squeeze(pert_data.variables['field569_1'])
-        pert_so2 = pert_so2_low + pert_so2_high
-
-        # Convert emissions from kg/m2/s to Tg/yr and
-        # compute the mass released in each grid cell
-        delta_so2 = areas * 2 * (3600 * 24 * 365 * 1e-9) * (pert_so2 - ctl_so2)
-
-        # Compute the total emission mass
-        delta_emiss_mass = np.ma.sum(np.ma.sum(delta_so2))
+        assert emission_region in constants.SO2_EMISS_REGIONS, \
+            "{} is not an accepted emission region for {}".format(emission_region, pollutant)
 
-        # Close open datasets
-        ctl_data.close()
-        pert_data.close()
+        delta_emiss_mass = load_all_emissions(pollutant)[emission_region]
 
     elif pollutant == 'BC':
-        # Load BC emissions
-        emission_path = os.path.join(DATA_PATH, "pdrmip/emissions/regridded_aerocom_BC_emissions_2006.nc")
-        emission_data = Dataset(emission_path, mode='r')
-        bc_emissions = np.squeeze(emission_data.variables['emibc'])
-        emission_data.close()
-
-        # Get the emission difference (the factor 9 is because the experiments are 10xBC) from the emission region
-        masked_delta_emissions = bc_emissions * regions.get_region_mask(emission_region) * 9
-
-        # Convert emissions from kg/m2/s to Tg/yr and
-        # compute the mass released in each grid cell
-        masked_delta_emiss_mass = areas * masked_delta_emissions * 3600 * 24 * 365 * 1e-9
+        assert emission_region in constants.BC_EMISS_REGIONS, \
+            "{} is not an accepted emission region for {}".format(emission_region, pollutant)
 
-        # Compute the total emission mass
-        delta_emiss_mass = np.ma.sum(np.ma.sum(masked_delta_emiss_mass))
+        delta_emiss_mass = load_all_emissions(pollutant)[emission_region]
 
     # TODO: add data source
     elif pollutant == 'CH4':
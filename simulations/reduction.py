@@ -0,0 +1,138 @@
+# Standard library imports
+from functools import lru_cache
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from simulations import loading, regions
+
+
+@lru_cache(maxsize=32)
+def _build_weight_matrix(region_names):
+    """Build the area weight matrix for a tuple of region names."""
+
+    areas = loading.load_grid_areas()
+
+    # Normalise the masked areas of each region by the total region area
+    region_weights = regions.get_region_masks_stack(region_names) * areas
+    region_weights = region_weights / loading.get_region_areas(region_names)[:, np.newaxis, np.newaxis]
+
+    # Add the global weights as last row
+    global_weights = areas / loading.get_total_area()
+
+    weights = np.concatenate([
+        region_weights.reshape(len(region_names), -1),
+        global_weights.reshape(1, -1)
+    ])
+
+    weights.flags.writeable = False
+
+    return weights
+
+
+def get_weight_matrix(region_names):
+    """Get the normalised area weight matrix of the specified regions.
+
+    Parameters
+    ----------
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    weights: ndarray of shape (len(region_names) + 1, 145 * 192)
+        Read-only matrix with the area weights of each region divided
+        by the total region area. The last row contains the global
+        weights (grid cell areas divided by the total area).
+    """
+
+    return _build_weight_matrix(tuple(region_names))
+
+
+def compute_area_averages(fields, region_names):
+    """Compute area-weighted regional and global averages of
+    a stack of gridded fields with a single matrix product.
+
+    Masked grid cells do not contribute to the averages.
+
+    Parameters
+    ----------
+    fields: ndarray of shape (..., 145, 192)
+        Gridded fields (e.g. temperature and precipitation
+        differences, or the same variable from many models).
+
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    region_avg: ndarray of shape (..., len(region_names))
+        Regional averages of each field.
+
+    global_avg: ndarray of shape (...)
+        Global averages of each field.
+    """
+
+    weights = get_weight_matrix(region_names)
+
+    # Flatten the grid dimensions and replace masked values with zeros
+    fields = np.ma.filled(fields, 0)
+    fields = fields.reshape(fields.shape[:-2] + (-1,))
+
+    averages = fields @ weights.T
+
+    return averages[..., :-1], averages[..., -1]
+
+
+@lru_cache(maxsize=32)
+def _build_hyperslab_weight_matrix(region_names, lat_start, lat_stop, lon_start, lon_stop):
+    """Build the regional area weight matrix of a tuple of region names restricted to a hyperslab."""
+
+    grid_shape = loading.load_grid_areas().shape
+
+    weights = _build_weight_matrix(region_names)[:-1].reshape((len(region_names),) + grid_shape)
+    weights = np.ascontiguousarray(weights[:, lat_start:lat_stop, lon_start:lon_stop])
+    weights = weights.reshape(len(region_names), -1)
+
+    weights.flags.writeable = False
+
+    return weights
+
+
+def compute_region_averages(fields, region_names, bounding_box):
+    """Compute area-weighted regional averages of a stack of gridded
+    fields restricted to a latitude and longitude hyperslab.
+
+    The hyperslab must contain all the grid cells of the regions
+    (see `regions.get_bounding_box`). Masked grid cells do not
+    contribute to the averages.
+
+    Parameters
+    ----------
+    fields: ndarray of shape (..., n_lat, n_lon)
+        Gridded fields in the hyperslab.
+
+    region_names: list of str
+        Names of the regions.
+
+    bounding_box: tuple of slices
+        Latitude and longitude slices of the hyperslab.
+
+    Returns
+    -------
+    region_avg: ndarray of shape (..., len(region_names))
+        Regional averages of each field.
+    """
+
+    lat_slice, lon_slice = bounding_box
+
+    weights = _build_hyperslab_weight_matrix(
+        tuple(region_names), lat_slice.start, lat_slice.stop, lon_slice.start, lon_slice.stop
+    )
+
+    # Flatten the grid dimensions and replace masked values with zeros
+    fields = np.ma.filled(fields, 0)
+    fields = fields.reshape(fields.shape[:-2] + (-1,))
+
+    return fields @ weights.T
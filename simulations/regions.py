@@ -1,113 +1,196 @@
 # Standard library imports
 import os
+import warnings
+from functools import lru_cache
 
 # Third party imports
 import numpy as np
-from netCDF4 import Dataset
+
+# Local application imports
+from simulations import store
 
 DATA_PATH = "data/ctl/"
 
+# Path of the control file with the grid coordinates
+GRID_PATH = os.path.join(DATA_PATH, "sample_ctl_file.nc")
+
+# Region boundaries (lon_min, lon_max, lat_min, lat_max)
+REGION_BOUNDS = {
+    'Global': (0., 360., -90., 90.),
+    'Tropics': (0., 360., -30., 30.),
+    'NHML': (0., 360., 30., 60.),
+    'NHHL': (0., 360., 60., 90.),
+    'SHML': (0., 360., -60., -30.),
+    'SHHL': (0., 360., -90., -60.),
+    'Europe': (-10., 40., 37., 70.),
+    'US': (235., 290., 30., 50.),
+    'China': (80., 120., 20., 50.),
+    'East Asia': (105., 145., 20., 45.),
+    'India': (70., 90., 10., 30.),
+    'Sahel': (-17., 38., 9., 19.),
+    'Asia': (60., 140., 10., 50.)
+}
+
+# Names of all available regions (in the same order as the mask cube)
+REGION_NAMES = list(REGION_BOUNDS.keys())
 
-def get_region_mask(region):
-    """Get the grid mask for the specified region."""
 
-    path = os.path.join(DATA_PATH, "sample_ctl_file.nc")
-    data = Dataset(path, mode='r')
+def read_grid_coordinates():
+    """Read the latitude and longitude of the grid cells from the sample control file."""
 
-    lat = data.variables['latitude'][:]
-    lon = data.variables['longitude'][:]
+    from netCDF4 import Dataset
+
+    data = Dataset(GRID_PATH, mode='r')
+
+    lat = np.array(data.variables['latitude'][:], dtype=float)
+    lon = np.array(data.variables['longitude'][:], dtype=float)
 
     data.close()
 
-    if region == 'Global':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = -90.
-        lat_max = 90.
-
-    elif region == 'Tropics':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = -30.
-        lat_max = 30.
-
-    elif region == 'NHML':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = 30.
-        lat_max = 60.
-
-    elif region == 'NHHL':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = 60.
-        lat_max = 90.
-
-    elif region == 'SHML':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = -60.
-        lat_max = -30.
-
-    elif region == 'SHHL':
-        lon_min = 0.
-        lon_max = 360.
-        lat_min = -90.
-        lat_max = -60.
-
-    elif region == 'Europe':
-        lon_min = -10.
-        lon_max = 40.
-        lat_min = 37.
-        lat_max = 70.
-
-    elif region == 'US':
-        lon_min = 235.
-        lon_max = 290.
-        lat_min = 30.
-        lat_max = 50.
-
-    elif region == 'China':
-        lon_min = 80.
-        lon_max = 120.
-        lat_min = 20.
-        lat_max = 50.
-
-    elif region == 'East Asia':
-        lon_min = 105.
-        lon_max = 145.
-        lat_min = 20.
-        lat_max = 45.
-
-    elif region == 'India':
-        lon_min = 70.
-        lon_max = 90.
-        lat_min = 10.
-        lat_max = 30.
-
-    elif region == 'Sahel':
-        lon_min = -17.
-        lon_max = 38.
-        lat_min = 9.
-        lat_max = 19.
-
-    elif region == 'Asia':
-        lon_min = 60.
-        lon_max = 140.
-        lat_min = 10.
-        lat_max = 50.
-
-    else:
+    return lat, lon
+
+
+@lru_cache(maxsize=None)
+def get_grid_coordinates():
+    """Get the latitude and longitude of the grid cells
+    from the data store, if packed, or from the sample control file.
+
+    Returns
+    -------
+    lat: ndarray of shape (145,)
+        Latitude of the grid cells.
+
+    lon: ndarray of shape (192,)
+        Longitude of the grid cells.
+    """
+
+    lat, lon = store.load_array('latitude'), store.load_array('longitude')
+
+    if lat is None or lon is None:
+        lat, lon = read_grid_coordinates()
+        lat.flags.writeable = False
+        lon.flags.writeable = False
+
+    return lat, lon
+
+
+def compute_region_masks(lat, lon):
+    """Compute the grid masks of all regions in `REGION_NAMES`
+    from the latitude `lat` and longitude `lon` of the grid cells."""
+
+    # Get region boundaries as arrays of shape (n_regions, 1, 1)
+    bounds = np.array([REGION_BOUNDS[name] for name in REGION_NAMES])
+    lon_min, lon_max, lat_min, lat_max = (b[:, np.newaxis, np.newaxis] for b in bounds.T)
+
+    # Create grid masks
+    masks = (
+        (lon[np.newaxis, np.newaxis, :] >= lon_min) & (lon[np.newaxis, np.newaxis, :] <= lon_max) &
+        (lat[np.newaxis, :, np.newaxis] >= lat_min) & (lat[np.newaxis, :, np.newaxis] <= lat_max)
+    )
+
+    return masks
+
+
+@lru_cache(maxsize=None)
+def get_region_masks():
+    """Get the grid masks of all regions in `REGION_NAMES`.
+
+    The masks are read from the data store, if packed with the same
+    region names and boundaries, or built once per process, and returned
+    as a read-only array that must not be modified by the caller.
+
+    Returns
+    -------
+    masks: boolean ndarray of shape (n_regions, 145, 192)
+        Stack of the grid masks of all regions,
+        ordered as in `REGION_NAMES`.
+    """
+
+    region_bounds = [[name, list(bounds)] for name, bounds in REGION_BOUNDS.items()]
+
+    stored_region_bounds = store.load_metadata('region_bounds')
+
+    if stored_region_bounds == region_bounds:
+        masks = store.load_array('region_masks')
+
+        if masks is not None:
+            return masks
+
+    elif stored_region_bounds is not None:
+        warnings.warn(
+            "the regions have changed since the data store was packed, "
+            "building the region masks instead (pack the store again)"
+        )
+
+    masks = compute_region_masks(*get_grid_coordinates())
+    masks.flags.writeable = False
+
+    return masks
+
+
+def get_region_masks_stack(region_names):
+    """Get the grid masks of the specified regions.
+
+    Parameters
+    ----------
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    masks: boolean ndarray of shape (len(region_names), 145, 192)
+        Stack of the grid masks of `region_names`.
+    """
+
+    for region in region_names:
+        assert region in REGION_BOUNDS, "{} is not an available region".format(region)
+
+    return get_region_masks()[[REGION_NAMES.index(region) for region in region_names]]
+
+
+@lru_cache(maxsize=None)
+def _compute_bounding_box(region_names):
+    """Compute the bounding box of a tuple of region names."""
+
+    masks = get_region_masks_stack(region_names).any(axis=0)
+
+    lat_idx = np.flatnonzero(masks.any(axis=1))
+    lon_idx = np.flatnonzero(masks.any(axis=0))
+
+    assert lat_idx.size > 0, "the regions {} contain no grid cells".format(list(region_names))
+
+    return slice(int(lat_idx[0]), int(lat_idx[-1]) + 1), slice(int(lon_idx[0]), int(lon_idx[-1]) + 1)
+
+
+def get_bounding_box(region_names):
+    """Get the smallest grid hyperslab containing all grid cells of the specified regions.
+
+    Parameters
+    ----------
+    region_names: list of str
+        Names of the regions.
+
+    Returns
+    -------
+    lat_slice: slice
+        Latitude indices of the hyperslab.
+
+    lon_slice: slice
+        Longitude indices of the hyperslab.
+    """
+
+    return _compute_bounding_box(tuple(region_names))
+
+
+def get_region_mask(region):
+    """Get the grid mask for the specified region.
+
+    The returned mask is a read-only boolean view
+    of the cached mask cube.
+    """
+
+    if region not in REGION_BOUNDS:
         print('Region not available or not existent')
         return
 
-    # Create grid mask
-    grid = [[0 for _j in range(192)] for _i in range(145)]
-    ind = []
-    for x in range(192):
-        for y in range(145):
-            if (lon[x] >= lon_min) and (lon[x] <= lon_max) and (lat[y] >= lat_min) and (lat[y] <= lat_max):
-                grid[y][x] = 1
-                ind.append(x+192*y)
-              
-    return np.int64(grid)
+    return get_region_masks()[REGION_NAMES.index(region)]
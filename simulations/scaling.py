@@ -1,3 +1,6 @@
+# Standard library imports
+from collections import namedtuple
+
 # Third party imports
 import numpy as np
 
@@ -7,12 +10,47 @@ from utils import stats, constants
 # Index of HadGEM3 - model used for SO2 simulations
 HadGEM3 = 3
 
+# Temperature and radiative forcing variations between perturbation
+# and control experiments in the different PDRMIP models
+PDRMIP_DTEMP = {
+    'BC': (1.31, 0.398, 1.66, 0.697, np.nan, 0.381, 0.166, 0.673, 0.159),
+    # TODO: these values apply to SO4, check for SO2
+    'SO2': (-2.71, -0.93, -2.72, -6.62, np.nan, -1.47, -1.12, -1.65, -1.17),
+    'CO2': (2.70, 1.49, 2.73, 3.73, 2.15, 3.17, 2.47, 2.06, 1.46),
+    'CH4': (0.60, 0.42, 0.80, 1.20, 0.44, 1.07, 0.52, 0.67, 0.30)
+}
+
+PDRMIP_DRF = {
+    'BC': (1.55, 1.23, 1.19, 0.70, np.nan, 0.77, 0.41, 1.40, 0.63),
+    # TODO: these values apply to SO4, check for SO2
+    'SO2': (-3.25, -2.79, -4.02, -8.26, np.nan, -2.04, -2.11, -3.79, -2.77),
+    'CO2': (3.57, 4.06, 3.37, 3.64, 4.14, 3.62, 4.06, 3.50, 3.62),
+    'CH4': (1.36, 1.34, 0.98, 1.39, 0.95, 1.27, 0.86, 1.24, 0.78)
+}
+
+# Multi-model scaling factors of a pollutant
+MMScaling = namedtuple(
+    'MMScaling', ['temp_scaling', 'rf_scaling', 'c_scaling', 'c_scaling_std_err', 'c_scaling_prop']
+)
+
+# Cache of the multi-model scaling factors of each pollutant
+_MM_SCALING_CACHE = dict()
+
+
+def clear_mm_scaling_cache():
+    """Clear the cached multi-model scaling factors.
+    Must be called after modifying `PDRMIP_DTEMP` or `PDRMIP_DRF`."""
+
+    _MM_SCALING_CACHE.clear()
+
 
 def get_mm_scaling(pollutant):
     """Get multi-model scaling factors for temperature, the radiative forcing and
     the climate sensitivity. Also computes the uncertainty associated with the
     climate sensitivity (used for the uncertainty propagation).
 
+    The scaling factors are computed once per pollutant and cached.
+
     Parameters
     ----------
     pollutant: str
@@ -24,52 +62,47 @@ def get_mm_scaling(pollutant):
 
     Returns
     -------
-    temp_scaling: float
-        The scaling factor for the temperature.
+    mm_scaling: MMScaling
+        Named tuple with the following fields:
+
+        temp_scaling: float
+            The scaling factor for the temperature.
 
-    rf_scaling: float
-        The scaling factor for the radiative forcing.
+        rf_scaling: float
+            The scaling factor for the radiative forcing.
 
-    c_scaling: float
-        The scaling factor for the climate sensitivity.
+        c_scaling: float
+            The scaling factor for the climate sensitivity.
 
-    c_scaling_error: float
-        The uncertainty associated with the climate
-        sensitivity scaling factor.
+        c_scaling_std_err: float
+            The uncertainty associated with the climate
+            sensitivity scaling factor.
 
-    c_scaling_prop: float
+        c_scaling_prop: float
+            The climate sensitivity scaling factor used
+            for error propagation.
     """
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
 
-    # Temperature, radiative forcing and precipitation variations between
-    # CO2 perturbation and control experiments in the different PDRMIP models
-    co2_dtemp = [2.70, 1.49, 2.73, 3.73, 2.15, 3.17, 2.47, 2.06, 1.46]
-    co2_drf = [3.57, 4.06, 3.37, 3.64, 4.14, 3.62, 4.06, 3.50, 3.62]
+    if pollutant not in _MM_SCALING_CACHE:
+        _MM_SCALING_CACHE[pollutant] = _compute_mm_scaling(pollutant)
 
-    # Compute temperature stats (average, standard deviation and
-    # ensemble standard deviation) for CO2 experiments
-    co2_dtemp_avg, co2_dtemp_std, co2_dtemp_std_err = stats.compute_stats(co2_dtemp)
+    return _MM_SCALING_CACHE[pollutant]
 
-    # Compute radiative forcing stats CO2 experiments
-    co2_drf_avg, co2_drf_std, co2_drf_std_err = stats.compute_stats(co2_drf)
 
-    if pollutant == 'BC':
-        dtemp = [1.31, 0.398, 1.66, 0.697, np.nan, 0.381, 0.166, 0.673, 0.159]
-        drf = [1.55, 1.23, 1.19, 0.70, np.nan, 0.77, 0.41, 1.40, 0.63]
+def _compute_mm_scaling(pollutant):
+    """Compute the multi-model scaling factors of `pollutant`."""
 
-    # TODO: these values apply to SO4, check for SO2
-    if pollutant == 'SO2':
-        dtemp = [-2.71, -0.93, -2.72, -6.62, np.nan, -1.47, -1.12, -1.65, -1.17]
-        drf = [-3.25, -2.79, -4.02, -8.26, np.nan, -2.04, -2.11, -3.79, -2.77]
+    # Compute temperature stats (average, standard deviation and
+    # ensemble standard deviation) for CO2 experiments
+    co2_dtemp_avg, co2_dtemp_std, co2_dtemp_std_err = stats.compute_stats(PDRMIP_DTEMP['CO2'])
 
-    if pollutant == 'CO2':
-        dtemp = [2.70, 1.49, 2.73, 3.73, 2.15, 3.17, 2.47, 2.06, 1.46]
-        drf = [3.57, 4.06, 3.37, 3.64, 4.14, 3.62, 4.06, 3.50, 3.62]
+    # Compute radiative forcing stats CO2 experiments
+    co2_drf_avg, co2_drf_std, co2_drf_std_err = stats.compute_stats(PDRMIP_DRF['CO2'])
 
-    if pollutant == 'CH4':
-        dtemp = [0.60, 0.42, 0.80, 1.20, 0.44, 1.07, 0.52, 0.67, 0.30]
-        drf = [1.36, 1.34, 0.98, 1.39, 0.95, 1.27, 0.86, 1.24, 0.78]
+    dtemp = PDRMIP_DTEMP[pollutant]
+    drf = PDRMIP_DRF[pollutant]
 
     # Compute radiative forcing stats for `pollutant` experiments
     drf_avg, drf_std, drf_std_err = stats.compute_stats(drf)
@@ -93,4 +126,4 @@ def get_mm_scaling(pollutant):
         (drf_std_err/drf_avg)**2
     )
 
-    return temp_scaling, rf_scaling, c_scaling, c_scaling_std_err, c_scaling_prop
+    return MMScaling(temp_scaling, rf_scaling, c_scaling, c_scaling_std_err, c_scaling_prop)
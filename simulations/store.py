@@ -0,0 +1,340 @@
+# Standard library imports
+import os
+import json
+import warnings
+from functools import lru_cache
+
+# Third party imports
+import numpy as np
+
+# Local application imports
+from utils import constants
+
+# Local paths
+STORE_PATH = "data/store/"
+MANIFEST_FILE = "manifest.json"
+DATA_FILE = "arrays.bin"
+
+# Version of the store layout (stores with a different version must be packed again)
+STORE_VERSION = 2
+
+# Alignment in bytes of the arrays in the data file
+ALIGNMENT = 64
+
+# Suffix of the entries holding the masks of masked arrays
+MASK_SUFFIX = "/mask"
+
+# Variables packed from the control and perturbation files of every experiment
+CLIMATE_VARIABLES = ['temp', 'precip']
+
+# SO2 emission variables (low and high level) of the SO2 experiment files
+SO2_EMISSION_VARIABLES = ['field569', 'field569_1']
+
+
+def get_variable_key(path, variable):
+    """Get the name of the store entry of `variable` in the netCDF file `path`."""
+
+    return "{}:{}".format(os.path.normpath(path), variable)
+
+
+def get_difference_key(ctl_path, pert_path, variable):
+    """Get the name of the store entry of the difference of `variable`
+    between the netCDF files `pert_path` and `ctl_path`."""
+
+    return "{}-{}:{}".format(os.path.normpath(pert_path), os.path.normpath(ctl_path), variable)
+
+
+@lru_cache(maxsize=None)
+def _load_manifest():
+    """Load the store manifest, or return None if the store has not been packed."""
+
+    manifest_path = os.path.join(STORE_PATH, MANIFEST_FILE)
+
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    assert manifest['version'] == STORE_VERSION, \
+        "the data store has version {} instead of {}, pack it again".format(manifest['version'], STORE_VERSION)
+
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def _open_data_file():
+    """Map the store data file in memory (read-only)."""
+
+    return np.memmap(os.path.join(STORE_PATH, DATA_FILE), dtype=np.uint8, mode='r')
+
+
+def clear_store_cache():
+    """Clear the cached manifest and memory map of the store."""
+
+    _load_manifest.cache_clear()
+    _open_data_file.cache_clear()
+
+
+def has_store():
+    """Check if the data store has been packed."""
+
+    return _load_manifest() is not None
+
+
+def _get_source_stat(path):
+    """Get the size and modification time (in ns) of the source file `path`."""
+
+    stat = os.stat(path)
+
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_up_to_date(name):
+    """Check if the source files of the store entry `name` are unchanged
+    since the store was packed (a source that is no longer available, e.g.
+    encrypted again, is not checked). A warning is issued otherwise."""
+
+    manifest = _load_manifest()
+
+    for path in manifest['entry_sources'].get(name, []):
+        if os.path.exists(path) and _get_source_stat(path) != manifest['sources'][path]:
+            warnings.warn(
+                "{} has changed since the data store was packed, reading it instead of "
+                "the store entry {} (pack the store again)".format(path, name)
+            )
+            return False
+
+    return True
+
+
+def _get_array(entry):
+    """Get a read-only zero-copy view of the data file described by `entry`."""
+
+    dtype = np.dtype(entry['dtype'])
+    count = int(np.prod(entry['shape']))
+
+    values = np.frombuffer(_open_data_file(), dtype=dtype, count=count, offset=entry['offset'])
+
+    return values.reshape(entry['shape'])
+
+
+def load_array(name):
+    """Load an array from the data store.
+
+    Parameters
+    ----------
+    name: str
+        Name of the store entry.
+
+    Returns
+    -------
+    values: read-only ndarray, masked array or None
+        Memory-mapped values of the entry, or None if the store
+        has not been packed, does not contain `name` or if its
+        source files have changed since it was packed. Arrays
+        packed with a mask are returned as masked arrays.
+    """
+
+    manifest = _load_manifest()
+
+    if manifest is None or name not in manifest['arrays'] or not is_up_to_date(name):
+        return None
+
+    entry = manifest['arrays'][name]
+    values = _get_array(entry)
+
+    if entry['masked']:
+        mask = _get_array(manifest['arrays'][name + MASK_SUFFIX])
+        values = np.ma.masked_array(values, mask=mask, fill_value=entry['fill_value'])
+        values.flags.writeable = False
+
+    return values
+
+
+def load_metadata(name):
+    """Load a metadata value from the data store, or None if not
+    available or if its source files have changed since it was packed."""
+
+    manifest = _load_manifest()
+
+    if manifest is None or name not in manifest['metadata'] or not is_up_to_date(name):
+        return None
+
+    return manifest['metadata'].get(name)
+
+
+def _write_array(f, values):
+    """Write `values` to the open data file `f` and get its manifest entry."""
+
+    # Pad the data file to the alignment of the array
+    f.write(b'\0' * (-f.tell() % ALIGNMENT))
+
+    values = np.ascontiguousarray(values)
+    entry = dict(offset=f.tell(), dtype=values.dtype.str, shape=list(values.shape), masked=False)
+
+    f.write(values.tobytes())
+
+    return entry
+
+
+def write_store(arrays, metadata, entry_sources=None):
+    """Write arrays and metadata to the data store.
+
+    The arrays are written contiguously to a single data file, each
+    aligned to `ALIGNMENT` bytes, and their offsets, data types and
+    shapes are recorded in the manifest, together with the size and
+    modification time of the source files of each entry. Both files
+    are replaced atomically once written.
+
+    Parameters
+    ----------
+    arrays: dict
+        Arrays (or masked arrays) to store, by entry name.
+
+    metadata: dict
+        JSON serialisable values to store, by name.
+
+    entry_sources: dict or None (default=None)
+        Paths of the source files of the arrays and metadata, by
+        entry name. Entries whose source files change are no
+        longer read from the store (see `is_up_to_date`).
+    """
+
+    entry_sources = dict() if entry_sources is None else entry_sources
+
+    os.makedirs(STORE_PATH, exist_ok=True)
+
+    manifest_path = os.path.join(STORE_PATH, MANIFEST_FILE)
+    data_path = os.path.join(STORE_PATH, DATA_FILE)
+
+    entries = dict()
+
+    with open(data_path + '.tmp', 'wb') as f:
+        for name, values in arrays.items():
+            mask = np.ma.getmask(values)
+
+            if mask is np.ma.nomask:
+                entries[name] = _write_array(f, values)
+            else:
+                data = np.ma.getdata(values)
+
+                entries[name] = _write_array(f, data)
+                entries[name].update(masked=True, fill_value=data.dtype.type(values.fill_value).item())
+                entries[name + MASK_SUFFIX] = _write_array(f, mask)
+
+    sources = {path: _get_source_stat(path) for paths in entry_sources.values() for path in paths}
+
+    manifest = {
+        'version': STORE_VERSION,
+        'arrays': entries,
+        'metadata': metadata,
+        'sources': sources,
+        'entry_sources': entry_sources
+    }
+
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    os.replace(data_path + '.tmp', data_path)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    clear_store_cache()
+
+
+def get_experiments():
+    """Get the (pollutant, emission region) pairs of all experiments."""
+
+    return (
+        [('SO2', region) for region in constants.SO2_EMISS_REGIONS] +
+        [('BC', region) for region in constants.BC_EMISS_REGIONS] +
+        [('CO2', 'Global'), ('CH4', 'Global')]
+    )
+
+
+def get_packed_variables():
+    """Get the (path, variable) pairs of the netCDF variables packed in the store."""
+
+    # Imported here as the loading module reads from the store
+    from simulations import loading
+
+    packed_variables = []
+
+    for pollutant, emission_region in get_experiments():
+        variables = CLIMATE_VARIABLES + (SO2_EMISSION_VARIABLES if pollutant == 'SO2' else [])
+
+        for path in loading.get_file_paths(pollutant, emission_region):
+            packed_variables += [
+                (path, variable) for variable in variables if (path, variable) not in packed_variables
+            ]
+
+    packed_variables.append((loading.BC_EMISSION_PATH, 'emibc'))
+
+    return packed_variables
+
+
+def pack_store():
+    """Convert the gridded inputs of `data/` to the data store.
+
+    The grid areas, the grid coordinates, the region masks, the
+    temperature and precipitation fields of every experiment (with
+    the global means of their differences), the emission fields and
+    the PDRMIP ERF tables are read from the original files and written
+    to a single memory-mappable store.
+    """
+
+    # Imported here as these modules read from the store
+    from simulations import loading, regions, input_selection
+
+    lat, lon = regions.read_grid_coordinates()
+    erf_table = input_selection.read_erf_table()
+
+    arrays = {
+        'areas': loading.read_grid_areas(),
+        'latitude': lat,
+        'longitude': lon,
+        'region_masks': regions.compute_region_masks(lat, lon),
+        'erf_t': erf_table.erf_t,
+        'erf_a': erf_table.erf_a
+    }
+
+    metadata = {
+        'region_bounds': [[name, list(bounds)] for name, bounds in regions.REGION_BOUNDS.items()],
+        'erf_models': list(erf_table.models),
+        'erf_experiments': list(erf_table.experiments)
+    }
+
+    erf_paths = [input_selection.ERF_T_PATH, input_selection.ERF_A_PATH]
+
+    entry_sources = {
+        'areas': [loading.AREAS_PATH],
+        'latitude': [regions.GRID_PATH],
+        'longitude': [regions.GRID_PATH],
+        'region_masks': [regions.GRID_PATH],
+        'erf_t': erf_paths,
+        'erf_a': erf_paths,
+        'erf_models': erf_paths,
+        'erf_experiments': erf_paths
+    }
+
+    for path, variable in get_packed_variables():
+        key = get_variable_key(path, variable)
+        arrays[key] = loading.read_variable(path, variable)
+        entry_sources[key] = [path]
+
+    # Global means of the perturbation minus control differences
+    for pollutant, emission_region in get_experiments():
+        ctl_path, pert_path = loading.get_file_paths(pollutant, emission_region)
+
+        for variable in CLIMATE_VARIABLES:
+            key = get_difference_key(ctl_path, pert_path, variable)
+            delta = arrays[get_variable_key(pert_path, variable)] - arrays[get_variable_key(ctl_path, variable)]
+
+            metadata[key] = float(loading.compute_global_mean(delta))
+            entry_sources[key] = [ctl_path, pert_path]
+
+    write_store(arrays, metadata, entry_sources)
+
+
+if __name__ == '__main__':
+    pack_store()
@@ -1,9 +1,19 @@
+# Standard library imports
+from collections import namedtuple
+from functools import lru_cache
+
 # Third party imports
 import numpy as np
 
 # Local application imports
 from utils import constants
-from simulations import loading, regions, input_selection, scaling
+from simulations import loading, reduction, regions, input_selection, scaling
+
+# Horizon-independent climate response to a pollutant perturbation
+RegionalResponse = namedtuple(
+    'RegionalResponse',
+    ['rr_temp_avg', 'temp_avg', 'rr_precip_avg', 'precip_avg', 'rr_rad_eff', 'rad_eff', 'rad_eff_a']
+)
 
 
 def compute_climate_variables(response_regions, grid_delta_temp, grid_delta_precip):
@@ -36,37 +46,122 @@ def compute_climate_variables(response_regions, grid_delta_temp, grid_delta_prec
         Average global precipitation differences.
     """
 
-    # Get grid cell areas and the response region (rr) mask
-    areas = loading.load_grid_areas()
+    # Compute the regional and global differences of both variables at once
+    rr_avg, glo_avg = reduction.compute_area_averages(
+        np.ma.stack([grid_delta_temp, grid_delta_precip]), response_regions
+    )
+
+    return rr_avg[0], glo_avg[0], rr_avg[1], glo_avg[1]
+
+
+@lru_cache(maxsize=128)
+def _load_climate_variables(pollutant, emission_region, response_regions):
+    """Load and average the climate variables for a tuple of response regions."""
+
+    # Get the gridded climate responses in the hyperslab containing the response regions
+    bounding_box = regions.get_bounding_box(response_regions)
+    grid_delta_temp, grid_delta_precip = loading.load_climate_variables(pollutant, emission_region, bounding_box)
+
+    # Compute regional averages of both variables at once
+    rr_avg = reduction.compute_region_averages(
+        np.ma.stack([grid_delta_temp, grid_delta_precip]), response_regions, bounding_box
+    )
+    rr_temp_avg, rr_precip_avg = rr_avg[0], rr_avg[1]
+
+    # Get global averages from the cached global means
+    temp_avg, precip_avg = loading.load_global_climate_variables(pollutant, emission_region)
+
+    rr_temp_avg.flags.writeable = False
+    rr_precip_avg.flags.writeable = False
+
+    return rr_temp_avg, temp_avg, rr_precip_avg, precip_avg
 
-    # Compute the regional differences
-    rr_temp_avg = []
-    rr_precip_avg = []
 
-    for rr in response_regions:
-        # Get the response region (rr) mask
-        rr_mask = regions.get_region_mask(rr)
+def get_climate_variables(pollutant, emission_region, response_regions):
+    """Get average regional and global temperature and precipitation
+    variations between perturbation and control experiments.
 
-        # Get total area of the response region
-        rr_masked_area = areas * rr_mask
-        rr_area = np.ma.sum(np.ma.sum(rr_masked_area))
+    The results are cached on (`pollutant`, `emission_region`, `response_regions`),
+    so the gridded files are loaded and averaged only once per combination.
 
-        # Compute the average regional temperature difference
-        rr_delta_temp = grid_delta_temp * rr_mask
-        rr_temp_avg.append(np.ma.sum(np.ma.sum(rr_delta_temp * rr_masked_area)) / rr_area)
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        List with names of the response regions.
+
+    Returns
+    -------
+    rr_temp_avg, temp_avg, rr_precip_avg, precip_avg
+        Read-only outputs of `compute_climate_variables`.
+    """
 
-        # Compute the average regional precipitation difference
-        rr_delta_precip = grid_delta_precip * rr_mask
-        rr_precip_avg.append(np.ma.sum(np.ma.sum(rr_delta_precip * rr_masked_area)) / rr_area)
+    return _load_climate_variables(pollutant, emission_region, tuple(response_regions))
 
-    # Compute the global temperature and precipitation differences
-    temp_avg = np.ma.sum(np.ma.sum(grid_delta_temp * areas)) / np.ma.sum(np.ma.sum(areas))
-    precip_avg = np.ma.sum(np.ma.sum(grid_delta_precip * areas)) / np.ma.sum(np.ma.sum(areas))
 
-    return np.array(rr_temp_avg), temp_avg, np.array(rr_precip_avg), precip_avg
+@lru_cache(maxsize=16)
+def _load_gridded_climate_variables(pollutant, emission_region):
+    """Load the gridded climate variables of an experiment."""
+
+    grid_delta_temp, grid_delta_precip = loading.load_climate_variables(pollutant, emission_region)
+    temp_avg, precip_avg = loading.load_global_climate_variables(pollutant, emission_region)
+
+    # Replace masked grid cells with NaN values
+    grid_delta_temp = np.ma.filled(grid_delta_temp.astype(float), np.nan)
+    grid_delta_precip = np.ma.filled(grid_delta_precip.astype(float), np.nan)
+
+    grid_delta_temp.flags.writeable = False
+    grid_delta_precip.flags.writeable = False
+
+    return grid_delta_temp, temp_avg, grid_delta_precip, precip_avg
+
+
+def get_gridded_climate_variables(pollutant, emission_region):
+    """Get gridded and global temperature and precipitation variations
+    between perturbation and control experiments.
+
+    The results are cached on (`pollutant`, `emission_region`).
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    Returns
+    -------
+    grid_delta_temp: read-only ndarray of shape (145, 192)
+        Gridded temperature differences (NaN in masked grid cells).
+
+    temp_avg: float
+        Average global temperature difference.
+
+    grid_delta_precip: read-only ndarray of shape (145, 192)
+        Gridded precipitation differences (NaN in masked grid cells).
+
+    precip_avg: float
+        Average global precipitation difference.
+    """
+
+    return _load_gridded_climate_variables(pollutant, emission_region)
 
 
-def compute_radiative_efficiency(pollutant, emission_region, response_regions):
+def compute_radiative_efficiency(pollutant, emission_region, response_regions, gridded=False):
     """Compute radiative efficiency change in `response_region` due to
     perturbation in emissions of `pollutant` from `emission_region`.
 
@@ -93,14 +188,20 @@ def compute_radiative_efficiency(pollutant, emission_region, response_regions):
         - Global
         - Asia
 
-    response_regions: list of strings
+    response_regions: list of strings or None
         List with response region names.
+        Ignored if `gridded` is True.
+
+    gridded: boolean (default=False)
+        If True, compute the radiative efficiency
+        of every grid cell instead of every region.
 
     Returns
     -------
     rr_rad_eff: array of floats
         Change in regional radiative efficiency for all
-        regions in `response_regions`.
+        regions in `response_regions`, or array of shape
+        (145, 192) with the change in every grid cell.
 
     rad_eff: float
         Change in global radiative efficiency.
@@ -113,39 +214,41 @@ def compute_radiative_efficiency(pollutant, emission_region, response_regions):
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
 
     # Get the effective radiative forcing
-    _, erf, erf_a = input_selection.select_emission_region(pollutant, emission_region)
+    erf, erf_a = input_selection.get_emission_region_erf(pollutant, emission_region)
 
     # Get the pollutant emission mass
     delta_emiss_mass = loading.load_emissions(pollutant, emission_region)
 
-    # Get the gridded climate responses
-    grid_delta_temp, grid_delta_precip = loading.load_climate_variables(pollutant, emission_region)
+    # Get the ratio of the regional (or grid cell) and global temperature differences
+    if gridded:
+        rr_temp_avg, temp_avg, _, _ = get_gridded_climate_variables(pollutant, emission_region)
+    else:
+        rr_temp_avg, temp_avg, _, _ = get_climate_variables(pollutant, emission_region, response_regions)
 
-    # Compute average climate variables
-    rr_temp_avg, temp_avg, rr_precip_avg, precip_avg = compute_climate_variables(
-        response_regions, grid_delta_temp, grid_delta_precip
-    )
+    temp_ratio = rr_temp_avg / temp_avg
 
     # Compute regional and global radiative efficiency for the different pollutants
     if pollutant == 'SO2':
-        rr_rad_eff = ((erf * scaling.get_mm_scaling(pollutant)[1]) * (rr_temp_avg / temp_avg) /
+        rf_scaling = scaling.get_mm_scaling(pollutant).rf_scaling
+
+        rr_rad_eff = ((erf * rf_scaling) * temp_ratio /
                       (delta_emiss_mass * constants.SPECS[pollutant]['tau']))
 
-        rad_eff = ((erf * scaling.get_mm_scaling(pollutant)[1]) /
+        rad_eff = ((erf * rf_scaling) /
                    (delta_emiss_mass * constants.SPECS[pollutant]['tau']))
 
-        rad_eff_a = ((erf_a * scaling.get_mm_scaling(pollutant)[1]) /
+        rad_eff_a = ((erf_a * rf_scaling) /
                      (delta_emiss_mass * constants.SPECS[pollutant]['tau']))
 
     elif pollutant == 'CO2':
-        rr_rad_eff = erf * (rr_temp_avg / temp_avg) / delta_emiss_mass
+        rr_rad_eff = erf * temp_ratio / delta_emiss_mass
 
         rad_eff = erf / delta_emiss_mass
 
         rad_eff_a = erf_a / delta_emiss_mass
 
     else:
-        rr_rad_eff = erf * (rr_temp_avg / temp_avg) / (delta_emiss_mass * constants.SPECS[pollutant]['tau'])
+        rr_rad_eff = erf * temp_ratio / (delta_emiss_mass * constants.SPECS[pollutant]['tau'])
 
         rad_eff = erf / (delta_emiss_mass * constants.SPECS[pollutant]['tau'])
 
@@ -154,14 +257,105 @@ def compute_radiative_efficiency(pollutant, emission_region, response_regions):
     return rr_rad_eff, rad_eff, rad_eff_a
 
 
+@lru_cache(maxsize=128)
+def _compute_regional_response(pollutant, emission_region, response_regions):
+    """Compute the regional response for a tuple of response regions."""
+
+    rr_temp_avg, temp_avg, rr_precip_avg, precip_avg = get_climate_variables(
+        pollutant, emission_region, response_regions
+    )
+
+    rr_rad_eff, rad_eff, rad_eff_a = compute_radiative_efficiency(pollutant, emission_region, response_regions)
+    rr_rad_eff.flags.writeable = False
+
+    return RegionalResponse(rr_temp_avg, temp_avg, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a)
+
+
+def get_regional_response(pollutant, emission_region, response_regions):
+    """Get all time horizon independent quantities needed to compute the potentials
+    of `pollutant` emitted from `emission_region` in `response_regions`.
+
+    The results are cached on (`pollutant`, `emission_region`, `response_regions`),
+    so that only the potential kernels need to be evaluated for each time horizon.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        List with names of the response regions.
+
+    Returns
+    -------
+    response: RegionalResponse
+        Named tuple with the average climate variables (see `compute_climate_variables`)
+        and the radiative efficiencies (see `compute_radiative_efficiency`).
+    """
+
+    return _compute_regional_response(pollutant, emission_region, tuple(response_regions))
+
+
+@lru_cache(maxsize=16)
+def _compute_gridded_response(pollutant, emission_region):
+    """Compute the gridded response of an experiment."""
+
+    grid_delta_temp, temp_avg, grid_delta_precip, precip_avg = get_gridded_climate_variables(
+        pollutant, emission_region
+    )
+
+    grid_rad_eff, rad_eff, rad_eff_a = compute_radiative_efficiency(pollutant, emission_region, None, gridded=True)
+    grid_rad_eff.flags.writeable = False
+
+    return RegionalResponse(grid_delta_temp, temp_avg, grid_delta_precip, precip_avg, grid_rad_eff, rad_eff, rad_eff_a)
+
+
+def get_gridded_response(pollutant, emission_region):
+    """Get all time horizon independent quantities needed to compute the
+    potentials of `pollutant` emitted from `emission_region` in every grid cell.
+
+    The results are cached on (`pollutant`, `emission_region`).
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    Returns
+    -------
+    response: RegionalResponse
+        Named tuple with the gridded climate variables and radiative efficiency
+        of shape (145, 192) in place of the regional ones (see
+        `get_gridded_climate_variables` and `compute_radiative_efficiency`).
+    """
+
+    return _compute_gridded_response(pollutant, emission_region)
+
+
 def get_scaled_climate_sensitivity(pollutant):
     """Get the scaled climate sensitivity for `pollutant`."""
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
 
+    c_scaling = scaling.get_mm_scaling(pollutant).c_scaling
+
     c_scaled = [
-        constants.C1 * scaling.get_mm_scaling(pollutant)[2],
-        constants.C2 * scaling.get_mm_scaling(pollutant)[2]
+        constants.C1 * c_scaling,
+        constants.C2 * c_scaling
     ]
 
     return c_scaled
@@ -5,7 +5,7 @@ import os
 from matplotlib import pyplot as plt
 
 # Local application imports
-from simulations import loading, variables, input_selection
+from simulations import variables, input_selection
 from metrics import slp
 from uncertainties import propagation
 from utils import constants
@@ -58,35 +58,18 @@ for pol in pollutants:
 
         for th in time_horizons:
 
-            # Load and compute climate variables average variations
-            grid_delta_temp, grid_delta_precip = loading.load_climate_variables(
-                pollutant=pol,
-                emission_region=reg
-            )
-
-            rr_temp_avg, temp_avg, rr_precip_avg, precip_avg = variables.compute_climate_variables(
-                response_regions=response_regions,
-                grid_delta_temp=grid_delta_temp,
-                grid_delta_precip=grid_delta_precip
-            )
+            # Get the (cached) climate variables average variations and radiative efficiencies
+            rr_temp_avg, temp_avg, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a = \
+                variables.get_regional_response(
+                    pollutant=pol,
+                    emission_region=reg,
+                    response_regions=response_regions
+                )
 
-            # Compute radiative efficiencies
-            rr_rad_eff, rad_eff, rad_eff_a = variables.compute_radiative_efficiency(
-                pollutant=pol,
-                emission_region=reg,
-                response_regions=response_regions
-            )
-
-            # Compute temperature potentials
-            iartp, artp = slp.compute_atp(
-                pollutant=pol,
-                rad_eff=rr_rad_eff,
-                th=th
-            )
-
-            # Compute precipitation potentials
-            iarpp, slow_iarpp, fast_iarpp, arpp, slow_arpp, fast_arpp = slp.compute_app(
+            # Compute temperature and precipitation potentials
+            iartp, artp, iarpp, slow_iarpp, fast_iarpp, arpp, slow_arpp, fast_arpp = slp.compute_potentials(
                 pollutant=pol,
+                rr_rad_eff=rr_rad_eff,
                 rad_eff=rad_eff,
                 rad_eff_a=rad_eff_a,
                 th=th,
@@ -94,24 +77,10 @@ for pol in pollutants:
                 precip_avg=precip_avg
             )
 
-            # Compute uncertainties
-            artp_std, arpp_std = propagation.get_potential_uncertainties(
-                pollutant=pol,
-                emission_region=reg,
-                response_regions=response_regions,
-                artp=artp,
-                slow_arpp=slow_arpp,
-                fast_arpp=fast_arpp
-            )
-
-            iartp_std, iarpp_std = propagation.get_potential_uncertainties(
-                pollutant=pol,
-                emission_region=reg,
-                response_regions=response_regions,
-                artp=iartp,
-                slow_arpp=slow_iarpp,
-                fast_arpp=fast_iarpp
-            )
+            # Compute uncertainties (the uncertainty context is cached)
+            context = propagation.get_uncertainty_context(pol, reg, response_regions)
+            artp_std, arpp_std = propagation.apply_uncertainty_context(context, artp, slow_arpp, fast_arpp)
+            iartp_std, iarpp_std = propagation.apply_uncertainty_context(context, iartp, slow_iarpp, fast_iarpp)
 
             # Store results in the dictionaries
             artp_dict[pol][reg][th] = artp
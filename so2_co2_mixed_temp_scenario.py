@@ -56,50 +56,33 @@ for pol in pollutants:
     )
 
     # Compute temperature potentials at each time step
-    artp_list = []
-    slow_arpp_list = []
-    fast_arpp_list = []
-
-    for t in np.linspace(time_step, time_horizons[-1], int(time_horizons[-1] * n_steps)):
-
-        if pol == 'CO2':
-            _, artp = co2.compute_atp(
-                rad_eff=rr_rad_eff,
-                th=t
-            )
-
-            _, _, _, arpp, slow_arpp, fast_arpp = co2.compute_app(
-                rad_eff=rad_eff,
-                rad_eff_a=rad_eff_a,
-                th=t,
-                rr_precip_avg=rr_precip_avg,
-                precip_avg=precip_avg
-            )
-
-        else:
-            _, artp = slp.compute_atp(
-                pollutant=pol,
-                rad_eff=rr_rad_eff,
-                th=t
-            )
-
-            _, _, _, _, slow_arpp, fast_arpp = slp.compute_app(
-                pollutant=pol,
-                rad_eff=rad_eff,
-                rad_eff_a=rad_eff_a,
-                th=t,
-                rr_precip_avg=rr_precip_avg,
-                precip_avg=precip_avg
-            )
-
-        artp_list.append(artp[0])
-        slow_arpp_list.append(slow_arpp[0])
-        fast_arpp_list.append(fast_arpp[0])
-
-    # Convert list to arrays
-    artp_array = np.array(artp_list).ravel()
-    slow_arpp_array = np.array(slow_arpp_list).ravel()
-    fast_arpp_array = np.array(fast_arpp_list).ravel()
+    t = np.linspace(time_step, time_horizons[-1], int(time_horizons[-1] * n_steps))
+
+    if pol == 'CO2':
+        potentials = co2.compute_potentials(
+            rr_rad_eff=rr_rad_eff,
+            rad_eff=rad_eff,
+            rad_eff_a=rad_eff_a,
+            th=t,
+            rr_precip_avg=rr_precip_avg,
+            precip_avg=precip_avg
+        )
+
+    else:
+        potentials = slp.compute_potentials(
+            pollutant=pol,
+            rr_rad_eff=rr_rad_eff,
+            rad_eff=rad_eff,
+            rad_eff_a=rad_eff_a,
+            th=t,
+            rr_precip_avg=rr_precip_avg,
+            precip_avg=precip_avg
+        )
+
+    # Select the single response region
+    artp_array = potentials.artp[:, 0]
+    slow_arpp_array = potentials.slow_arpp[:, 0]
+    fast_arpp_array = potentials.fast_arpp[:, 0]
 
     # Compute temperature in different scenarios
     temp_response = temperature_scenarios.compute_mixed_scenarios_temperature(
@@ -107,13 +90,9 @@ for pol in pollutants:
     )
 
     # Compute uncertainties
-    temp_std, _ = propagation.get_potential_uncertainties(
-        pollutant=pol,
-        emission_region=emission_region,
-        response_regions=response_regions,
-        artp=np.array(temp_response).ravel(),
-        slow_arpp=slow_arpp_array,
-        fast_arpp=fast_arpp_array
+    context = propagation.get_uncertainty_context(pol, emission_region, response_regions)
+    temp_std, _ = propagation.apply_uncertainty_context(
+        context, temp_response, slow_arpp_array, fast_arpp_array
     )
 
     # Store results in dictionaries
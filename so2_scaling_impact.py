@@ -41,58 +41,47 @@ rr_rad_eff, rad_eff, rad_eff_a = variables.compute_radiative_efficiency(
 )
 
 # Compute temperature potentials with and without scalings at each time step
+t = np.linspace(time_step, time_horizon, int(time_horizon * n_steps))
+
+iartp, artp = slp.compute_atp(
+    pollutant=pollutant,
+    rad_eff=rr_rad_eff,
+    th=t
+)
+
+no_c_iartp, no_c_artp = slp.compute_atp(
+    pollutant=pollutant,
+    rad_eff=rr_rad_eff,
+    th=t,
+    c_scaling=False
+)
+
+no_erf_iartp, no_erf_artp = slp.compute_atp(
+    pollutant=pollutant,
+    rad_eff=rr_rad_eff,
+    th=t,
+    erf_scaling=False
+)
+
+no_c_no_erf_iartp, no_c_no_erf_artp = slp.compute_atp(
+    pollutant=pollutant,
+    rad_eff=rr_rad_eff,
+    th=t,
+    c_scaling=False,
+    erf_scaling=False
+)
+
 artp_dict = dict()
 iartp_dict = dict()
 
-artp_dict['artp'] = []
-iartp_dict['iartp'] = []
-artp_dict['no_c_artp'] = []
-iartp_dict['no_c_iartp'] = []
-artp_dict['no_erf_artp'] = []
-iartp_dict['no_erf_iartp'] = []
-artp_dict['no_c_no_erf_artp'] = []
-iartp_dict['no_c_no_erf_iartp'] = []
-
-for t in np.linspace(time_step, time_horizon, int(time_horizon * n_steps)):
-
-    iartp, artp = slp.compute_atp(
-        pollutant=pollutant,
-        rad_eff=rr_rad_eff,
-        th=t
-    )
-
-    no_c_iartp, no_c_artp = slp.compute_atp(
-        pollutant=pollutant,
-        rad_eff=rr_rad_eff,
-        th=t,
-        c_scaling=False
-    )
-
-    no_erf_iartp, no_erf_artp = slp.compute_atp(
-        pollutant=pollutant,
-        rad_eff=rr_rad_eff,
-        th=t,
-        erf_scaling=False
-    )
-
-    no_c_no_erf_iartp, no_c_no_erf_artp = slp.compute_atp(
-        pollutant=pollutant,
-        rad_eff=rr_rad_eff,
-        th=t,
-        c_scaling=False,
-        erf_scaling=False
-    )
-
-    artp_dict['artp'].append(artp[0])
-    iartp_dict['iartp'].append(iartp[0])
-    artp_dict['no_c_artp'].append(no_c_artp[0])
-    iartp_dict['no_c_iartp'].append(no_c_iartp[0])
-    artp_dict['no_erf_artp'].append(no_erf_artp[0])
-    iartp_dict['no_erf_iartp'].append(no_erf_iartp[0])
-    artp_dict['no_c_no_erf_artp'].append(no_c_no_erf_artp[0])
-    iartp_dict['no_c_no_erf_iartp'].append(no_c_no_erf_iartp[0])
-
-    print("\rt = {:5.2f}".format(t), flush=True, end=" ")
+artp_dict['artp'] = artp[:, 0]
+iartp_dict['iartp'] = iartp[:, 0]
+artp_dict['no_c_artp'] = no_c_artp[:, 0]
+iartp_dict['no_c_iartp'] = no_c_iartp[:, 0]
+artp_dict['no_erf_artp'] = no_erf_artp[:, 0]
+iartp_dict['no_erf_iartp'] = no_erf_iartp[:, 0]
+artp_dict['no_c_no_erf_artp'] = no_c_no_erf_artp[:, 0]
+iartp_dict['no_c_no_erf_iartp'] = no_c_no_erf_iartp[:, 0]
 
 # Plot figure
 sensitivity.plot_scalings(artp_dict, iartp_dict, time_horizon)
@@ -1,9 +1,100 @@
+# Standard library imports
+from functools import lru_cache
+
 # Local application imports
 from simulations import input_selection
 from uncertainties import ctl_runs
 from utils import stats
 
 
+def _get_region_names(response_regions):
+    """Get the names of the response regions and of
+    the regions (including Global) to load."""
+
+    if 'All regions' in response_regions:
+        response_regions = input_selection.get_response_regions()
+
+    if 'Global' not in response_regions:
+        region_names = list(response_regions) + ['Global']
+    else:
+        region_names = list(response_regions)
+
+    return list(response_regions), region_names
+
+
+@lru_cache(maxsize=None)
+def _get_model_means(region_names):
+    """Get the regional model means, averages and standard errors of the
+    control runs for the tuple `region_names` (cached, so that the stats and
+    the covariances of the same regions read the control runs only once).
+
+    Returns
+    -------
+    model_stats: tuple of tuples
+        For temperature and precipitation, read-only arrays with the model
+        means of shape (n_regions, n_runs), the averages and the standard errors.
+    """
+
+    model_stats = []
+
+    for df in ctl_runs.get_model_variability(list(region_names)):
+        model_columns = [column for column in df.columns if column.startswith('Model')]
+
+        arrays = (
+            df[model_columns].to_numpy(dtype=float),
+            df['avg'].to_numpy(dtype=float),
+            df['std_err'].to_numpy(dtype=float)
+        )
+
+        for values in arrays:
+            values.flags.writeable = False
+
+        model_stats.append(arrays)
+
+    return tuple(model_stats)
+
+
+def get_climate_covariance(response_regions, std_err=True):
+    """Get the covariance matrices of the regional temperature
+    and precipitation averages of the control runs.
+
+    Parameters
+    ----------
+    response_regions: list of str
+        Names of the response regions.
+        If response_region='All regions', the covariances
+        of all response regions will be returned. Global is
+        always included.
+
+    std_err: boolean (default=True)
+        If True, compute the covariances using the standard error.
+        If False, compute the covariances using the standard deviation.
+
+    Returns
+    -------
+    temp_cov: DataFrame
+        (regions x regions) covariance matrix of the temperature averages.
+
+    precip_cov: DataFrame
+        (regions x regions) covariance matrix of the precipitation averages.
+    """
+
+    import pandas as pd
+
+    _, region_names = _get_region_names(response_regions)
+
+    (temp_means, _, _), (precip_means, _, _) = _get_model_means(tuple(region_names))
+
+    temp_cov = pd.DataFrame(
+        stats.compute_covariance_matrix(temp_means, std_err=std_err), index=region_names, columns=region_names
+    )
+    precip_cov = pd.DataFrame(
+        stats.compute_covariance_matrix(precip_means, std_err=std_err), index=region_names, columns=region_names
+    )
+
+    return temp_cov, precip_cov
+
+
 def get_climate_stats(response_regions):
     """Get regional and global temperature and precipitation stats.
 
@@ -16,81 +107,46 @@ def get_climate_stats(response_regions):
 
     Returns
     -------
-    reg_temp_avg: float or list
-        Regional average temperature or list of regional average
-        temperatures if response_region='All regions.
+    reg_temp_avg: ndarray
+        Regional average temperatures.
 
     glo_temp_avg: float
         Global average temperature.
 
-    temp_ratio_std_err: float or list
-        Standard error of the ratio between regional and global average temperatures
-        list of standard errors if response_region='All regions.
+    temp_ratio_std_err: ndarray
+        Standard errors of the ratio between regional and global average temperatures.
 
-    reg_precip_avg: float or list
-        Regional average precipitation or list of regional average
-        precipitations if response_region='All regions.
+    reg_precip_avg: ndarray
+        Regional average precipitations.
 
     glo_precip_avg: float
         Global average precipitation.
 
-    precip_ratio_std_err: float or list
-        Standard error of the ratio between regional and global average precipitations
-        or list of standard errors if response_region='All regions.
+    precip_ratio_std_err: ndarray
+        Standard errors of the ratio between regional and global average precipitations.
     """
 
     # Get region names
-    if 'All regions' in response_regions:
-        region_names = input_selection.get_response_regions()
-    elif 'Global' not in response_regions:
-        region_names = response_regions + ['Global']
-    else:
-        region_names = response_regions
+    response_regions, region_names = _get_region_names(response_regions)
+
+    reg_idx = [region_names.index(name) for name in response_regions]
+    glo_idx = region_names.index('Global')
 
     # Get temperature and precipitation intermodel variability
-    temp_df, precip_df = ctl_runs.get_model_variability(region_names)
-
-    glo_temp_avg = temp_df.loc['Global', 'avg']
-    glo_temp_std_err = temp_df.loc['Global', 'std_err']
-    glo_precip_avg = precip_df.loc['Global', 'avg']
-    glo_precip_std_err = precip_df.loc['Global', 'std_err']
-
-    # Compute temperature and precipitation stats for each region
-    reg_temp_avg = []
-    reg_temp_std_err = []
-    temp_ratio_std_err = []
-    reg_precip_avg = []
-    reg_precip_std_err = []
-    precip_ratio_std_err = []
-
-    for name in response_regions:
-
-        # Compute regional temperature average, standard error and covariance with global temperature
-        reg_temp_avg.append(temp_df.loc[name, 'avg'])
-        reg_temp_std_err.append(temp_df.loc[name, 'std_err'])
-        reg_glo_temp_cov = stats.compute_covariance(
-            temp_df.loc[name][0:6], temp_df.loc['Global'][0:6], std_err=True
-        )
+    results = []
 
-        # Compute regional precipitation average, standard error and covariance with global precipitation
-        reg_precip_avg.append(precip_df.loc[name, 'avg'])
-        reg_precip_std_err.append(precip_df.loc[name, 'std_err'])
-        reg_glo_precip_cov = stats.compute_covariance(
-            precip_df.loc[name][0:6], precip_df.loc['Global'][0:6], std_err=True
-        )
+    for means, avg, std_err in _get_model_means(tuple(region_names)):
 
-        # Compute standard error of regional and global temperature ratio
-        temp_ratio_std_err.append(
-            stats.compute_ratio_std(
-                reg_temp_avg[-1], glo_temp_avg, reg_temp_std_err[-1], glo_temp_std_err, reg_glo_temp_cov
-            )
-        )
+        # Compute the covariance of all regions with the global average
+        glo_cov = stats.compute_covariance_matrix(means, std_err=True)[reg_idx, glo_idx]
 
-        # Compute standard error of regional and global precipitation ratio
-        precip_ratio_std_err.append(
-            stats.compute_ratio_std(
-                reg_precip_avg[-1], glo_precip_avg, reg_precip_std_err[-1], glo_precip_std_err, reg_glo_precip_cov
-            )
+        # Compute standard errors of the regional and global ratios
+        ratio_std_err = stats.compute_ratio_std(
+            avg[reg_idx], avg[glo_idx], std_err[reg_idx], std_err[glo_idx], glo_cov
         )
 
+        results.extend([avg[reg_idx], avg[glo_idx], ratio_std_err])
+
+    reg_temp_avg, glo_temp_avg, temp_ratio_std_err, reg_precip_avg, glo_precip_avg, precip_ratio_std_err = results
+
     return reg_temp_avg, glo_temp_avg, temp_ratio_std_err, reg_precip_avg, glo_precip_avg, precip_ratio_std_err
@@ -2,12 +2,10 @@
 import os
 
 # Third party imports
-import pandas as pd
 import numpy as np
-from netCDF4 import Dataset
 
 # Local application imports
-from simulations import loading, regions
+from simulations import loading, reduction, regions
 
 # Local paths
 DATA_PATH = "data/ctl/"
@@ -15,8 +13,56 @@ DATA_PATH = "data/ctl/"
 # Number of control simulations
 N = 6
 
+# Variables loaded from the control files
+CTL_VARIABLES = ['temp', 'precip']
 
-def get_model_variability(response_regions):
+
+def _load_ctl_fields(i, bounding_box=None):
+    """Load the temperature and precipitation fields of the `i`-th
+    control run, restricted to the hyperslab `bounding_box`, if specified."""
+
+    from netCDF4 import Dataset
+
+    file_name = '{}_150.nc'.format(i)
+
+    # Read the first time step and level
+    index = (0, 0) if bounding_box is None else (0, 0) + tuple(bounding_box)
+
+    with loading.NETCDF_LOCK:
+        data = Dataset(os.path.join(DATA_PATH, file_name), mode='r')
+        fields = [np.ma.filled(data.variables[variable][index], 0) for variable in CTL_VARIABLES]
+        data.close()
+
+    return np.stack(fields)
+
+
+def load_ctl_fields(n_runs=N, bounding_box=None):
+    """Load the temperature and precipitation fields of all control runs.
+
+    The files are read one after the other (the netCDF reads are
+    serialised by `loading.NETCDF_LOCK`).
+
+    Parameters
+    ----------
+    n_runs: int (default=N)
+        Number of control runs.
+
+    bounding_box: tuple of slices or None (default=None)
+        If specified, only read the latitude and longitude
+        hyperslab of `regions.get_bounding_box`.
+
+    Returns
+    -------
+    fields: ndarray of shape (n_runs, 2, 145, 192)
+        Temperature (first) and precipitation (second) fields
+        of each control run (restricted to `bounding_box`,
+        if specified). Masked values are set to zero.
+    """
+
+    return np.stack([_load_ctl_fields(i, bounding_box) for i in range(n_runs)])
+
+
+def get_model_variability(response_regions, n_runs=N):
     """Get temperature and precipitation averages from different simulations
     and corresponding standard deviations.
 
@@ -26,6 +72,9 @@ def get_model_variability(response_regions):
         Names of the response regions in which to
         measure model variability.
 
+    n_runs: int (default=N)
+        Number of control runs.
+
     Returns
     -------
     region_temp_df: DataFrame
@@ -37,54 +86,32 @@ def get_model_variability(response_regions):
         averages and corresponding standard deviations.
     """
 
-    # Load grid cell areas
-    areas = loading.load_grid_areas()
+    import pandas as pd
 
-    # Create DataFrames filled with NaN values
-    n_regions = len(response_regions)
+    # Load the hyperslab of all control fields containing the response regions and
+    # compute regional averages of shape (n_runs, 2, n_regions) with a single weighted reduction
+    bounding_box = regions.get_bounding_box(response_regions)
+    fields = load_ctl_fields(n_runs, bounding_box=bounding_box)
+    region_avg = reduction.compute_region_averages(fields, response_regions, bounding_box)
 
-    temp_avg = [[np.nan for _ in range(N)] for __ in range(n_regions)]
-    precip_avg = [[np.nan for _ in range(N)] for __ in range(n_regions)]
+    # Get arrays of shape (n_regions, n_runs) for each variable
+    temp_avg = region_avg[:, 0].T
+    precip_avg = region_avg[:, 1].T
 
-    columns = ['Model1', 'Model2', 'Model3', 'Model4', 'Model5', 'Model6']
-    region_temp_df = pd.DataFrame(index=response_regions, columns=columns)
-    region_precip_df = pd.DataFrame(index=response_regions, columns=columns)
-    
-    for i in range(N):
-        # Load control files
-        file_name = '{}_150.nc'.format(i)
-        data = Dataset(os.path.join(DATA_PATH, file_name), mode='r')
-        temp = data.variables['temp'][0][0]
-        precip = data.variables['precip'][0][0]
-        data.close()
+    columns = ['Model{}'.format(i + 1) for i in range(n_runs)]
+
+    dfs = []
+
+    for values in [temp_avg, precip_avg]:
+        std = np.nanstd(values, axis=1, ddof=1)
+
+        df = pd.DataFrame(values, index=response_regions, columns=columns)
+        df['avg'] = np.nanmean(values, axis=1)
+        df['std'] = std
+        df['std_err'] = std / np.sqrt(n_runs)
+
+        dfs.append(df)
+
+    region_temp_df, region_precip_df = dfs
 
-        # Loop through relevant regions
-        for j in range(n_regions):
-            region = response_regions[j]
-
-            # Compute average regional temperature and precipitation
-            region_mask = regions.get_region_mask(region)
-            region_masked_area = areas * region_mask
-            total_area = np.ma.sum(np.ma.sum(region_masked_area))
-            
-            region_temp = temp * region_mask
-            region_temp_avg = (np.ma.sum(np.ma.sum(region_temp * region_masked_area)) / total_area)
-            temp_avg[j][i] = region_temp_avg
-
-            region_precip = precip * region_mask
-            region_precip_avg = (np.ma.sum(np.ma.sum(region_precip * region_masked_area)) / total_area)
-            precip_avg[j][i] = region_precip_avg
-
-    for i, column in enumerate(region_temp_df.columns):
-        region_temp_df[column] = [avg[i] for avg in temp_avg]
-        region_precip_df[column] = [avg[i] for avg in precip_avg]
-    
-    region_temp_df['avg'] = region_temp_df[columns].mean(axis=1)
-    region_temp_df['std'] = region_temp_df[columns].std(axis=1)
-    region_temp_df['std_err'] = region_temp_df[columns].std(axis=1) / np.sqrt(N)
-
-    region_precip_df['avg'] = region_precip_df[columns].mean(axis=1)
-    region_precip_df['std'] = region_precip_df[columns].std(axis=1)
-    region_precip_df['std_err'] = region_precip_df[columns].std(axis=1) / np.sqrt(N)
-      
     return region_temp_df, region_precip_df
@@ -4,7 +4,6 @@ import os
 # Third party imports
 import numpy as np
 import json
-from netCDF4 import Dataset
 
 # Local application imports
 from simulations import loading
@@ -13,6 +12,20 @@ from utils import stats, constants
 # Local paths
 DATA_PATH = "data/"
 
+# Number of time steps of the radiative forcing time series read at once
+CHUNK_SIZE = 12
+
+
+def _read_global_erf(data, start, stop, areas, total_area):
+    """Read the radiative forcing of the time steps from `start` to `stop`
+    of the dataset `data` and compute its global average at each time step."""
+
+    variables = data.variables
+
+    erf = variables['field200'][start:stop] - (variables['field201'][start:stop] + variables['olr'][start:stop])
+
+    return np.ma.filled(np.ravel(np.sum(erf * areas, axis=(-2, -1)) / total_area), np.nan)
+
 
 def get_so2_regional_uncertainty(emission_region):
     """Get uncertainty in global ERF from regional emissions of SO2.
@@ -43,41 +56,47 @@ def get_so2_regional_uncertainty(emission_region):
     assert emission_region in constants.SO2_EMISS_REGIONS, \
         "{} is not an accepted emission region for SO2.".format(emission_region)
 
-    # Get grid cell areas and the response region (rr) mask
+    # Get grid cell areas and their total area
     areas = loading.load_grid_areas()
-    total_area = np.ma.sum(np.ma.sum(areas))
+    total_area = loading.get_total_area()
 
-    # Load control and perturbation experiments
+    from netCDF4 import Dataset
+
+    # Get control and perturbation experiment paths
     path = os.path.join(DATA_PATH, 'so2/TOA_RF_tseries/')
     ctl_path = os.path.join(path, 'HadGEM3_Atmos_Control_25yr_RF_tseries.nc')
     pert_path = os.path.join(path, 'HadGEM3_Atmos_noSO2_{}_25yr_RF_tseries.nc'.format(emission_region))
 
-    ctl = Dataset(ctl_path, mode='r')
-    pert = Dataset(pert_path, mode='r')
+    # Accumulate the moments and co-moments of the control (first)
+    # and perturbation (second) global radiative forcing time series
+    count, mean, comoment = stats.compute_comoments(np.empty((2, 0)))
 
-    # Compute regional radiative forcing
-    ctl_erf = ctl.variables['field200'][:] - (ctl.variables['field201'][:] + ctl.variables['olr'][:])
-    pert_erf = pert.variables['field200'][:] - (pert.variables['field201'][:] + pert.variables['olr'][:])
+    with Dataset(ctl_path, mode='r') as ctl, Dataset(pert_path, mode='r') as pert:
+        n_steps = len(ctl.variables['field200'])
+
+        assert len(pert.variables['field200']) == n_steps, \
+            "the control and perturbation time series have different lengths"
 
-    # Compute average global radiative forcing
-    ctl_glo_erf = np.squeeze(np.sum(np.sum(ctl_erf * areas, axis=3), axis=2)) / total_area
-    pert_glo_erf = np.squeeze(np.sum(np.sum(pert_erf * areas, axis=3), axis=2)) / total_area
+        for start in range(0, n_steps, CHUNK_SIZE):
+            with loading.NETCDF_LOCK:
+                ctl_glo_erf = _read_global_erf(ctl, start, start + CHUNK_SIZE, areas, total_area)
+                pert_glo_erf = _read_global_erf(pert, start, start + CHUNK_SIZE, areas, total_area)
+
+            count, mean, comoment = stats.merge_comoments(
+                count, mean, comoment, *stats.compute_comoments([ctl_glo_erf, pert_glo_erf])
+            )
 
     # Compute radiative forcing stats
-    ctl_erf_avg, ctl_erf_std, ctl_erf_std_err = stats.compute_stats(ctl_glo_erf)
-    pert_erf_avg, pert_erf_std, pert_erf_std_err = stats.compute_stats(pert_glo_erf)
+    ctl_erf_avg, pert_erf_avg = mean
+    ctl_erf_std_err, pert_erf_std_err = np.sqrt(np.diag(comoment) / (count - 1)) / np.sqrt(count)
 
-    # Compute covariance of control and perturbation experiments
-    ctl_pert_erf_cov = stats.compute_covariance(ctl_glo_erf, pert_glo_erf, std_err=True)
+    # Compute covariance of control and perturbation experiments (using the standard error)
+    ctl_pert_erf_cov = comoment[0, 1] / (count - 1) / count
 
     # Compute average and standard deviation of control and perturbation difference
     ctl_pert_avg = pert_erf_avg - ctl_erf_avg
     ctl_pert_std_err = np.sqrt(ctl_erf_std_err**2 + pert_erf_std_err**2 - 2 * ctl_pert_erf_cov)
 
-    # Close loaded datasets
-    ctl.close()
-    pert.close()
-
     return ctl_pert_avg, ctl_pert_std_err
 
 
@@ -232,6 +251,8 @@ def get_global_uncertainty(pollutant):
     elif pollutant == 'BC':
         pert_file = 'HadGEM3_atmos_10xBC_global_tseries_15.nc'
 
+    from netCDF4 import Dataset
+
     # Load data
     ctl = Dataset(os.path.join(path, ctl_file), mode='r')
     pert = Dataset(os.path.join(path, pert_file), mode='r')
@@ -0,0 +1,303 @@
+# Standard library imports
+from collections import namedtuple
+
+# Third party imports
+import numpy as np
+from scipy.stats import norm, qmc
+
+# Local application imports
+from metrics import slp, co2
+from metrics.potentials import Potentials
+from simulations import input_selection, variables
+from uncertainties import propagation
+from utils import constants
+
+# Parameters of the single lifetime pollutant potentials
+SLP_PARAMETERS = ['tau', 'k', 'fp', 'C1', 'C2', 'D1', 'D2', 'ERF']
+
+# Parameters of the CO2 potentials (including the impulse response function)
+CO2_PARAMETERS = ['k', 'fp', 'C1', 'C2', 'D1', 'D2', 'a0', 'a1', 'a2', 'a3', 'tau1', 'tau2', 'tau3', 'ERF']
+
+# Relative standard deviation of the parameters without a published uncertainty
+DEFAULT_REL_STD = 0.1
+
+# Potentials analysed by default
+SENSITIVITY_POTENTIALS = ['artp', 'arpp', 'iartp', 'iarpp']
+
+# First-order and total Sobol indices of a potential
+SobolIndices = namedtuple('SobolIndices', ['parameters', 'first_order', 'total'])
+
+
+def get_parameter_names(pollutant):
+    """Get the names of the parameters of the potentials of `pollutant`."""
+
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    if pollutant == 'CO2':
+        return list(CO2_PARAMETERS)
+
+    return list(SLP_PARAMETERS)
+
+
+def get_parameter_rel_std(pollutant, emission_region, response_regions):
+    """Get the relative standard deviations of the parameters of the potentials.
+
+    The lifetime and the k factor use the standard deviations of `constants.SPECS`,
+    the climate sensitivities use the multi-model standard error of the scaling factor
+    and the ERF combines the regional and global ERF standard errors. All other
+    parameters use `DEFAULT_REL_STD`.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    Returns
+    -------
+    rel_std: dict
+        Relative standard deviation of each parameter.
+    """
+
+    context = propagation.get_uncertainty_context(pollutant, emission_region, response_regions)
+    specs = constants.SPECS[pollutant]
+
+    rel_std = {name: DEFAULT_REL_STD for name in get_parameter_names(pollutant)}
+
+    if pollutant != 'CO2':
+        rel_std['tau'] = specs['tau_std'] / specs['tau']
+
+    rel_std['k'] = specs['k_std'] / specs['k']
+    rel_std['C1'] = np.abs(context.c_scaling_rel_err)
+    rel_std['C2'] = np.abs(context.c_scaling_rel_err)
+    rel_std['ERF'] = np.sqrt(context.reg_erf_rel_err ** 2 + context.glo_erf_rel_err ** 2)
+
+    return rel_std
+
+
+def _get_factors(u, rel_std):
+    """Map uniform variables to log-normal factors with mean
+    one and relative standard deviations `rel_std`."""
+
+    sigma = np.sqrt(np.log(1 + np.asarray(rel_std) ** 2))
+
+    return np.exp(sigma * norm.ppf(u) - sigma ** 2 / 2)
+
+
+def _evaluate_factors(pollutant, response, c_scaled, th, factors, names):
+    """Evaluate the potentials with the parameters of `names`
+    multiplied by `factors` of shape (n_samples, n_parameters)."""
+
+    _, _, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a = response
+    specs = constants.SPECS[pollutant]
+
+    f = {name: factors[:, i, np.newaxis, np.newaxis] for i, name in enumerate(names)}
+
+    kwargs = dict(
+        rr_rad_eff=rr_rad_eff * f['ERF'],
+        rad_eff=rad_eff * f['ERF'],
+        rad_eff_a=rad_eff_a * f['ERF'],
+        th=np.reshape(th, (1, -1, 1)),
+        precip_ratio=rr_precip_avg / precip_avg,
+        c_scaled=[c_scaled[0] * f['C1'], c_scaled[1] * f['C2']],
+        d=[constants.D[0] * f['D1'], constants.D[1] * f['D2']],
+        k=specs['k'] * f['k'],
+        fp=specs['fp'] * f['fp']
+    )
+
+    if pollutant == 'CO2':
+        potentials = co2.compute_potential_kernel(
+            a0=specs['a0'] * f['a0'],
+            ai=[specs['ai'][i] * f['a{}'.format(i + 1)] for i in range(3)],
+            tau=[specs['tau'][i] * f['tau{}'.format(i + 1)] for i in range(3)],
+            **kwargs
+        )
+    else:
+        potentials = slp.compute_potential_kernel(tau=specs['tau'] * f['tau'], **kwargs)
+
+    shape = (factors.shape[0], np.size(th), np.size(rr_rad_eff))
+
+    return Potentials(*[np.broadcast_to(potential, shape) for potential in potentials])
+
+
+def compute_sobol_indices(
+        pollutant, emission_region, response_regions, th, n_samples=1024,
+        potential_names=SENSITIVITY_POTENTIALS, seed=None
+):
+    """Compute first-order and total Sobol indices of the potentials with respect
+    to their parameters, for all response regions and time horizons at once.
+
+    The indices are estimated with a scrambled Sobol Saltelli design, using the
+    Saltelli et al. (2010) first-order and the Jansen total effect estimators.
+    The potentials are evaluated with `n_parameters + 2` batched kernel calls.
+    Each parameter is multiplied by an independent log-normal factor with mean
+    one and the relative standard deviation of `get_parameter_rel_std`.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    n_samples: int (default=1024)
+        Number of base samples (a power of two).
+
+    potential_names: list of str (default=SENSITIVITY_POTENTIALS)
+        Names of the potentials to analyse (see `metrics.potentials.POTENTIAL_NAMES`).
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the scrambling of the Sobol sequence.
+
+    Returns
+    -------
+    indices: dict
+        `SobolIndices` named tuple of each potential in `potential_names`, with the
+        parameter names and the first-order and total indices of shape
+        (n_parameters, n_th, n_regions).
+    """
+
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    for name in potential_names:
+        assert name in Potentials._fields, "{} is not an available potential".format(name)
+
+    if 'All regions' in response_regions:
+        response_regions = input_selection.get_response_regions()
+
+    names = get_parameter_names(pollutant)
+    rel_std = get_parameter_rel_std(pollutant, emission_region, response_regions)
+    rel_std = [rel_std[name] for name in names]
+    n_parameters = len(names)
+
+    response = variables.get_regional_response(pollutant, emission_region, response_regions)
+    c_scaled = variables.get_scaled_climate_sensitivity(pollutant)
+
+    # Get the two independent base designs of the Saltelli scheme
+    sampler = qmc.Sobol(2 * n_parameters, scramble=True, seed=np.random.default_rng(seed))
+    u = sampler.random(n_samples)
+    factors_a = _get_factors(u[:, :n_parameters], rel_std)
+    factors_b = _get_factors(u[:, n_parameters:], rel_std)
+
+    potentials_a = _evaluate_factors(pollutant, response, c_scaled, th, factors_a, names)
+    potentials_b = _evaluate_factors(pollutant, response, c_scaled, th, factors_b, names)
+
+    f_a = {name: getattr(potentials_a, name) for name in potential_names}
+    f_b = {name: getattr(potentials_b, name) for name in potential_names}
+    variance = {name: np.var(np.concatenate([f_a[name], f_b[name]]), axis=0) for name in potential_names}
+
+    first_order = {name: [] for name in potential_names}
+    total = {name: [] for name in potential_names}
+
+    for i in range(n_parameters):
+
+        # Take the i-th parameter from the second design
+        factors_ab = factors_a.copy()
+        factors_ab[:, i] = factors_b[:, i]
+
+        potentials_ab = _evaluate_factors(pollutant, response, c_scaled, th, factors_ab, names)
+
+        for name in potential_names:
+            f_ab = getattr(potentials_ab, name)
+
+            first_order[name].append(np.mean(f_b[name] * (f_ab - f_a[name]), axis=0) / variance[name])
+            total[name].append(0.5 * np.mean((f_a[name] - f_ab) ** 2, axis=0) / variance[name])
+
+    return {
+        name: SobolIndices(names, np.array(first_order[name]), np.array(total[name]))
+        for name in potential_names
+    }
+
+
+def get_sobol_table(
+        pollutant, emission_regions, response_regions, th, n_samples=1024,
+        potential_names=SENSITIVITY_POTENTIALS, seed=None
+):
+    """Get a table with the first-order and total Sobol indices of the potentials
+    for every emission region, response region and time horizon.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_regions: list of str
+        Names of the emission regions.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    n_samples: int (default=1024)
+        Number of base samples (a power of two).
+
+    potential_names: list of str (default=SENSITIVITY_POTENTIALS)
+        Names of the potentials to analyse.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the scrambling of the Sobol sequence.
+
+    Returns
+    -------
+    table: DataFrame
+        DataFrame with the emission region, response region, time horizon,
+        potential, parameter, first-order and total index of each combination.
+    """
+
+    import pandas as pd
+
+    if 'All regions' in response_regions:
+        response_regions = input_selection.get_response_regions()
+
+    th = np.atleast_1d(th)
+
+    tables = []
+
+    for emission_region in emission_regions:
+        indices = compute_sobol_indices(
+            pollutant, emission_region, response_regions, th, n_samples, potential_names, seed
+        )
+
+        for name in potential_names:
+            parameters, first_order, total = indices[name]
+
+            # Get all (parameter, horizon, region) combinations in the index array order
+            parameter_idx, th_idx, region_idx = np.indices(first_order.shape).reshape(3, -1)
+
+            tables.append(pd.DataFrame({
+                'emission_region': emission_region,
+                'response_region': np.array(response_regions)[region_idx],
+                'th': th[th_idx],
+                'potential': name,
+                'parameter': np.array(parameters)[parameter_idx],
+                'first_order': first_order.ravel(),
+                'total': total.ravel()
+            }))
+
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,709 @@
+# Standard library imports
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# Third party imports
+import numpy as np
+from scipy.stats import norm, qmc
+
+# Local application imports
+from metrics import slp, co2
+from metrics.potentials import Potentials
+from simulations import input_selection, variables
+from uncertainties import propagation
+from utils import constants, stats
+
+# Names of the parameters sampled once per Monte Carlo draw
+SCALAR_PARAMETERS = ['tau', 'k', 'c_scaling', 'reg_erf', 'glo_erf', 'reg_erfa', 'glo_erfa']
+
+# Names of the parameters sampled once per Monte Carlo draw and response region
+REGIONAL_PARAMETERS = ['temp_ratio', 'precip_ratio']
+
+# Available sampling designs
+SAMPLERS = ['random', 'sobol', 'lhs']
+
+# Default percentiles of the potential distributions
+PERCENTILES = [5, 50, 95]
+
+# Default number of samples evaluated at once
+CHUNK_SIZE = 1000
+
+# Number of samples of each independently seeded block of a sharded run
+# (a power of two, as required by the balance properties of Sobol sequences)
+BLOCK_SIZE = 8192
+
+# Number of histogram bins of the quantile sketches
+N_BINS = 200
+
+# Number of samples of the pilot run setting the range of the quantile sketches
+N_PILOT = 2000
+
+# Fraction of the pilot range added on each side of the quantile sketches
+PILOT_MARGIN = 0.5
+
+# Potentials summarised by default in a sharded run
+SUMMARY_POTENTIALS = ['iartp', 'artp', 'iarpp', 'arpp']
+
+# Summary statistics of the Monte Carlo distribution of a potential
+MCStatistics = namedtuple('MCStatistics', ['count', 'mean', 'std', 'percentiles'])
+
+# Convergence of the percentile estimates with the number of samples
+Convergence = namedtuple('Convergence', ['sample_sizes', 'percentiles', 'percentile_std_err', 'interval_width'])
+
+
+def get_n_dimensions(n_regions):
+    """Get the number of standard normal variables of a
+    Monte Carlo draw for `n_regions` response regions."""
+
+    return len(SCALAR_PARAMETERS) + len(REGIONAL_PARAMETERS) * n_regions
+
+
+def _get_seed_sequence(seed):
+    """Get the `SeedSequence` of `seed` (an int, a SeedSequence or None)."""
+
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def draw_standard_normal(n_samples, n_regions, seed=None, sampler='random'):
+    """Draw standard normal variables for the Monte Carlo parameters.
+
+    Parameters
+    ----------
+    n_samples: int
+        Number of samples.
+
+    n_regions: int
+        Number of response regions.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the random number generator.
+
+    sampler: str (default='random')
+        One of the following sampling designs:
+        - random: pseudo-random sampling
+        - sobol: scrambled Sobol sequence (balanced for powers of two)
+        - lhs: Latin hypercube
+        The quasi-Monte Carlo designs are mapped to
+        normal variables with the inverse normal CDF.
+
+    Returns
+    -------
+    z: ndarray of shape (n_samples, get_n_dimensions(n_regions))
+        Standard normal variables. The columns are ordered as
+        `SCALAR_PARAMETERS` followed by `REGIONAL_PARAMETERS`,
+        each with one column per response region.
+    """
+
+    assert sampler in SAMPLERS, "{} is not an available sampler".format(sampler)
+
+    rng = np.random.default_rng(seed)
+    n_dimensions = get_n_dimensions(n_regions)
+
+    if sampler == 'random':
+        return rng.standard_normal((n_samples, n_dimensions))
+
+    if sampler == 'sobol':
+        engine = qmc.Sobol(n_dimensions, scramble=True, seed=rng)
+    else:
+        engine = qmc.LatinHypercube(n_dimensions, seed=rng)
+
+    return norm.ppf(engine.random(n_samples))
+
+
+def sample_lifetime(pollutant, z):
+    """Map standard normal variables to log-normal samples of the lifetime
+    of `pollutant`, with mean and standard deviation `tau` and `tau_std`."""
+
+    tau = constants.SPECS[pollutant]['tau']
+    tau_std = constants.SPECS[pollutant]['tau_std']
+
+    sigma = np.sqrt(np.log(1 + (tau_std / tau) ** 2))
+    mu = np.log(tau) - sigma ** 2 / 2
+
+    return np.exp(mu + sigma * z)
+
+
+def _get_region_names(response_regions):
+    """Get the names of the response regions."""
+
+    if 'All regions' in response_regions:
+        return input_selection.get_response_regions()
+
+    return list(response_regions)
+
+
+def evaluate_samples(pollutant, emission_region, response_regions, th, z):
+    """Evaluate the potentials for a set of Monte Carlo draws
+    in a single broadcasted call to the potential kernel.
+
+    The k factor is sampled from a normal distribution with the standard
+    deviation of `constants.SPECS` and the lifetime from a log-normal
+    distribution (to keep it positive) with the mean and standard deviation
+    of `constants.SPECS` (the CO2 lifetimes are not sampled). The climate
+    sensitivity scaling, the ERF, the ERFa and the regional/global temperature
+    and precipitation ratios are multiplied by normal factors with the relative
+    standard errors of the uncertainty context (see `propagation.get_uncertainty_context`).
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    z: ndarray of shape (n_samples, get_n_dimensions(n_regions))
+        Standard normal variables (see `draw_standard_normal`).
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast iARPP,
+        ARPP, slow and fast ARPP, each of shape (n_samples, n_th, n_regions).
+    """
+
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    region_names = _get_region_names(response_regions)
+    n_regions = len(region_names)
+
+    z = np.asarray(z, dtype=float)
+    assert z.shape[-1] == get_n_dimensions(n_regions), \
+        "z must have {} columns".format(get_n_dimensions(n_regions))
+
+    # Get central values and relative uncertainties
+    response = variables.get_regional_response(pollutant, emission_region, region_names)
+    context = propagation.get_uncertainty_context(pollutant, emission_region, region_names)
+    c_scaled = variables.get_scaled_climate_sensitivity(pollutant)
+
+    return _evaluate_kernel(pollutant, response, context, c_scaled, th, z)
+
+
+def _evaluate_kernel(pollutant, response, context, c_scaled, th, z):
+    """Evaluate the potential kernel of `pollutant` for the Monte Carlo draws `z`."""
+
+    _, _, rr_precip_avg, precip_avg, rr_rad_eff, rad_eff, rad_eff_a = response
+    specs = constants.SPECS[pollutant]
+    n_regions = np.size(rr_rad_eff)
+
+    # Split the standard normal variables into arrays of shape
+    # (n_samples, 1, 1) and (n_samples, 1, n_regions)
+    n_scalar = len(SCALAR_PARAMETERS)
+    scalar_z = {name: z[:, i, np.newaxis, np.newaxis] for i, name in enumerate(SCALAR_PARAMETERS)}
+    regional_z = {
+        name: z[:, np.newaxis, n_scalar + i * n_regions:n_scalar + (i + 1) * n_regions]
+        for i, name in enumerate(REGIONAL_PARAMETERS)
+    }
+
+    # The SO2 ERFa is derived from the ERF, so they share the same draw
+    if pollutant == 'SO2':
+        scalar_z['reg_erfa'] = scalar_z['reg_erf']
+
+    # Get relative perturbation factors
+    reg_erf = 1 + np.abs(context.reg_erf_rel_err) * scalar_z['reg_erf']
+    glo_erf = 1 + np.abs(context.glo_erf_rel_err) * scalar_z['glo_erf']
+    reg_erfa = 1 + np.abs(context.reg_erfa_rel_err) * scalar_z['reg_erfa']
+    glo_erfa = 1 + np.abs(context.glo_erfa_rel_err) * scalar_z['glo_erfa']
+    c_scaling = 1 + np.abs(context.c_scaling_rel_err) * scalar_z['c_scaling']
+    temp_ratio = 1 + np.abs(context.temp_ratio_rel_err) * regional_z['temp_ratio']
+    precip_ratio = 1 + np.abs(context.precip_ratio_rel_err) * regional_z['precip_ratio']
+
+    # Get time horizons of shape (1, n_th, 1)
+    th = np.reshape(th, (1, -1, 1))
+
+    kwargs = dict(
+        rr_rad_eff=rr_rad_eff * reg_erf * glo_erf * temp_ratio,
+        rad_eff=rad_eff * reg_erf * glo_erf,
+        rad_eff_a=rad_eff_a * reg_erfa * glo_erfa,
+        th=th,
+        precip_ratio=(rr_precip_avg / precip_avg) * precip_ratio,
+        c_scaled=[c * c_scaling for c in c_scaled],
+        d=constants.D,
+        k=specs['k'] + specs['k_std'] * scalar_z['k'],
+        fp=specs['fp']
+    )
+
+    if pollutant == 'CO2':
+        potentials = co2.compute_potential_kernel(a0=specs['a0'], ai=specs['ai'], tau=specs['tau'], **kwargs)
+    else:
+        potentials = slp.compute_potential_kernel(tau=sample_lifetime(pollutant, scalar_z['tau']), **kwargs)
+
+    # Broadcast all potentials to (n_samples, n_th, n_regions)
+    shape = (z.shape[0], th.shape[1], n_regions)
+
+    return Potentials(*[np.broadcast_to(potential, shape) for potential in potentials])
+
+
+def compute_potential_samples(
+        pollutant, emission_region, response_regions, th, n_samples=8192, seed=None,
+        chunk_size=CHUNK_SIZE, sampler='random'
+):
+    """Compute Monte Carlo samples of the potentials.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    n_samples: int (default=8192)
+        Number of Monte Carlo samples.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the random number generator. The same
+        seed always gives the same samples.
+
+    chunk_size: int or None (default=CHUNK_SIZE)
+        Maximum number of samples evaluated at once, to cap the
+        memory used by the temporary arrays. If None, evaluate
+        all samples at once.
+
+    sampler: str (default='random')
+        Sampling design (see `draw_standard_normal`).
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the iARTP, ARTP, iARPP, slow and fast iARPP,
+        ARPP, slow and fast ARPP, each of shape (n_samples, n_th, n_regions).
+    """
+
+    n_regions = len(_get_region_names(response_regions))
+    n_th = np.size(th)
+
+    z = draw_standard_normal(n_samples, n_regions, seed, sampler)
+
+    if chunk_size is None:
+        chunk_size = n_samples
+
+    samples = Potentials(*[np.empty((n_samples, n_th, n_regions)) for _ in Potentials._fields])
+
+    for start in range(0, n_samples, chunk_size):
+        chunk = evaluate_samples(pollutant, emission_region, response_regions, th, z[start:start + chunk_size])
+
+        for sample, potential in zip(samples, chunk):
+            sample[start:start + chunk_size] = potential
+
+    return samples
+
+
+def compute_potential_percentiles(
+        pollutant, emission_region, response_regions, th, percentiles=PERCENTILES,
+        n_samples=8192, seed=None, chunk_size=CHUNK_SIZE, sampler='random'
+):
+    """Compute percentiles of the Monte Carlo distributions of the potentials.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    percentiles: list of floats (default=PERCENTILES)
+        Percentiles to compute (between 0 and 100).
+
+    n_samples: int (default=8192)
+        Number of Monte Carlo samples.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the random number generator.
+
+    chunk_size: int or None (default=CHUNK_SIZE)
+        Maximum number of samples evaluated at once.
+
+    sampler: str (default='random')
+        Sampling design (see `draw_standard_normal`).
+
+    Returns
+    -------
+    potentials: Potentials
+        Named tuple with the percentiles of the iARTP, ARTP, iARPP,
+        slow and fast iARPP, ARPP, slow and fast ARPP, each of
+        shape (len(percentiles), n_th, n_regions).
+    """
+
+    samples = compute_potential_samples(
+        pollutant, emission_region, response_regions, th, n_samples, seed, chunk_size, sampler
+    )
+
+    return Potentials(*[np.percentile(sample, percentiles, axis=0) for sample in samples])
+
+
+def _histogram(values, lower, width, n_bins):
+    """Count `values` of shape (n_samples, ...) in `n_bins` equal bins starting at
+    `lower` with `width`, plus an underflow (first) and an overflow (last) bin."""
+
+    n_cells = np.prod(values.shape[1:], dtype=int)
+
+    bins = np.floor((values - lower) / width)
+    bins = np.clip(bins, -1, n_bins).astype(int) + 1
+
+    # Offset the bins of each cell so that a single bincount covers all cells
+    bins = bins + (n_bins + 2) * np.arange(n_cells).reshape(values.shape[1:])
+
+    counts = np.bincount(bins.ravel(), minlength=(n_bins + 2) * n_cells)
+
+    return counts.reshape(values.shape[1:] + (n_bins + 2,))
+
+
+def _merge_summaries(summary_a, summary_b):
+    """Merge the moments, extremes and histograms of two sets of samples."""
+
+    count, mean, m2 = stats.merge_moments(*summary_a[:3], *summary_b[:3])
+
+    return (
+        count, mean, m2,
+        np.minimum(summary_a[3], summary_b[3]),
+        np.maximum(summary_a[4], summary_b[4]),
+        summary_a[5] + summary_b[5]
+    )
+
+
+def _evaluate_block(args):
+    """Compute the moments, extremes and histograms of the
+    potentials of a block of Monte Carlo samples."""
+
+    pollutant, response, context, c_scaled, th, seed_seq, n_samples, chunk_size, sampler, names, sketches = args
+
+    z = draw_standard_normal(n_samples, np.size(response.rr_rad_eff), seed_seq, sampler)
+
+    summaries = dict()
+
+    for start in range(0, n_samples, chunk_size):
+        potentials = _evaluate_kernel(pollutant, response, context, c_scaled, th, z[start:start + chunk_size])
+
+        for name in names:
+            values = getattr(potentials, name)
+            lower, width = sketches[name]
+            mean = np.mean(values, axis=0)
+
+            summary = (
+                values.shape[0],
+                mean,
+                np.sum((values - mean) ** 2, axis=0),
+                np.min(values, axis=0),
+                np.max(values, axis=0),
+                _histogram(values, lower, width, N_BINS)
+            )
+
+            if name in summaries:
+                summary = _merge_summaries(summaries[name], summary)
+
+            summaries[name] = summary
+
+    return summaries
+
+
+def _merge_block_summaries(block_summaries):
+    """Merge the summaries of consecutive blocks."""
+
+    summaries = dict()
+
+    for block_summary in block_summaries:
+        for name, summary in block_summary.items():
+            if name in summaries:
+                summary = _merge_summaries(summaries[name], summary)
+
+            summaries[name] = summary
+
+    return summaries
+
+
+def _get_sketch_range(pollutant, response, context, c_scaled, th, seed_seq, names):
+    """Get the lower edge and the bin width of the quantile sketches from a pilot run."""
+
+    z = draw_standard_normal(N_PILOT, np.size(response.rr_rad_eff), seed_seq)
+    potentials = _evaluate_kernel(pollutant, response, context, c_scaled, th, z)
+
+    sketches = dict()
+
+    for name in names:
+        values = getattr(potentials, name)
+        minimum = np.min(values, axis=0)
+        maximum = np.max(values, axis=0)
+        margin = PILOT_MARGIN * (maximum - minimum)
+
+        width = (maximum - minimum + 2 * margin) / N_BINS
+        width = np.where(width > 0, width, 1.)
+
+        sketches[name] = (minimum - margin, width)
+
+    return sketches
+
+
+def _get_sketch_percentiles(percentiles, count, minimum, maximum, lower, width, counts):
+    """Estimate percentiles from the histogram of a quantile sketch by
+    linear interpolation within the bin containing each percentile."""
+
+    # Get bin edges of shape (..., N_BINS + 3), the underflow and
+    # overflow bins are bounded by the minimum and maximum values
+    inner_edges = lower[..., np.newaxis] + width[..., np.newaxis] * np.arange(N_BINS + 1)
+    edges = np.concatenate([minimum[..., np.newaxis], inner_edges, maximum[..., np.newaxis]], axis=-1)
+    edges[..., 1:-1] = np.clip(edges[..., 1:-1], minimum[..., np.newaxis], maximum[..., np.newaxis])
+
+    cumulative = np.cumsum(counts, axis=-1)
+
+    results = []
+
+    for percentile in percentiles:
+        target = percentile / 100 * count
+
+        # Find the first bin whose cumulative count reaches the target
+        bins = np.argmax(cumulative >= target, axis=-1)[..., np.newaxis]
+        previous = np.where(bins > 0, np.take_along_axis(cumulative, np.maximum(bins - 1, 0), axis=-1), 0)
+        in_bin = np.take_along_axis(counts, bins, axis=-1)
+        fraction = np.where(in_bin > 0, (target - previous) / np.maximum(in_bin, 1), 0)
+
+        bin_lower = np.take_along_axis(edges, bins, axis=-1)
+        bin_upper = np.take_along_axis(edges, bins + 1, axis=-1)
+
+        results.append((bin_lower + fraction * (bin_upper - bin_lower))[..., 0])
+
+    return np.array(results)
+
+
+def compute_potential_statistics(
+        pollutant, emission_region, response_regions, th, n_samples=131072, seed=None,
+        percentiles=PERCENTILES, potential_names=SUMMARY_POTENTIALS, n_workers=None,
+        block_size=BLOCK_SIZE, chunk_size=CHUNK_SIZE, sampler='random'
+):
+    """Compute summary statistics of the Monte Carlo distributions of the
+    potentials, sharding the samples across a pool of processes.
+
+    The samples are split in blocks of `block_size` samples, each drawn
+    from its own `SeedSequence.spawn` stream. The means and standard
+    deviations are merged from streaming moments and the percentiles
+    are estimated from histogram quantile sketches whose range is set by
+    a pilot run. Blocks are merged in order, so the results are identical
+    for any number of workers.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    n_samples: int (default=131072)
+        Number of Monte Carlo samples. Use a multiple of `block_size`
+        with the Sobol sampler, so that all blocks are balanced.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the random number generator.
+
+    percentiles: list of floats (default=PERCENTILES)
+        Percentiles to estimate (between 0 and 100).
+
+    potential_names: list of str (default=SUMMARY_POTENTIALS)
+        Names of the potentials to summarise (see `metrics.potentials.POTENTIAL_NAMES`).
+
+    n_workers: int or None (default=None)
+        Number of worker processes. If None or 1, the
+        blocks are evaluated in the current process.
+
+    block_size: int (default=BLOCK_SIZE)
+        Number of samples of each block (a power of two with the Sobol sampler).
+
+    chunk_size: int (default=CHUNK_SIZE)
+        Maximum number of samples evaluated at once within a block.
+
+    sampler: str (default='random')
+        Sampling design (see `draw_standard_normal`). With the quasi-Monte
+        Carlo designs, each block is an independently scrambled design.
+
+    Returns
+    -------
+    statistics: dict
+        `MCStatistics` named tuple of each potential in `potential_names`,
+        with the number of samples, the mean and standard deviation of shape
+        (n_th, n_regions) and the percentiles of shape (len(percentiles), n_th, n_regions).
+    """
+
+    assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
+
+    for name in potential_names:
+        assert name in Potentials._fields, "{} is not an available potential".format(name)
+
+    region_names = _get_region_names(response_regions)
+
+    # Get central values and relative uncertainties
+    response = variables.get_regional_response(pollutant, emission_region, region_names)
+    context = propagation.get_uncertainty_context(pollutant, emission_region, region_names)
+    c_scaled = variables.get_scaled_climate_sensitivity(pollutant)
+
+    # Spawn the seeds of the pilot run and of each block
+    n_blocks = -(-n_samples // block_size)
+    pilot_seq, blocks_seq = _get_seed_sequence(seed).spawn(2)
+    block_seqs = blocks_seq.spawn(n_blocks)
+
+    sketches = _get_sketch_range(pollutant, response, context, c_scaled, th, pilot_seq, potential_names)
+
+    tasks = [
+        (
+            pollutant, response, context, c_scaled, th, block_seqs[i],
+            min(block_size, n_samples - i * block_size), chunk_size, sampler, potential_names, sketches
+        )
+        for i in range(n_blocks)
+    ]
+
+    # Evaluate the blocks and merge their summaries in block order
+    if n_workers is None or n_workers == 1:
+        summaries = _merge_block_summaries(map(_evaluate_block, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            summaries = _merge_block_summaries(executor.map(_evaluate_block, tasks))
+
+    statistics = dict()
+
+    for name in potential_names:
+        count, mean, m2, minimum, maximum, counts = summaries[name]
+        lower, width = sketches[name]
+
+        statistics[name] = MCStatistics(
+            count=count,
+            mean=mean,
+            std=np.sqrt(m2 / (count - 1)),
+            percentiles=_get_sketch_percentiles(percentiles, count, minimum, maximum, lower, width, counts)
+        )
+
+    return statistics
+
+
+def compute_convergence(
+        pollutant, emission_region, response_regions, th, sample_sizes=(256, 1024, 4096),
+        percentiles=PERCENTILES, potential_name='iartp', n_replicates=10, seed=None, sampler='random'
+):
+    """Compute a convergence diagnostic of the percentile estimates of a potential.
+
+    For each sample size, the percentiles are estimated from `n_replicates`
+    independent replicates (independently scrambled designs for the quasi-Monte
+    Carlo samplers). The spread of the estimates across the replicates gives their
+    standard error, which can be compared between samplers to choose the number
+    of samples needed for a given confidence interval width.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+
+    response_regions: list of str
+        Names of the response regions.
+
+    th: int, float or array of floats
+        Time horizons.
+
+    sample_sizes: list of int (default=(256, 1024, 4096))
+        Numbers of samples. Powers of two keep the Sobol sequences balanced.
+
+    percentiles: list of floats (default=PERCENTILES)
+        Percentiles to estimate (between 0 and 100).
+
+    potential_name: str (default='iartp')
+        Name of the potential (see `metrics.potentials.POTENTIAL_NAMES`).
+
+    n_replicates: int (default=10)
+        Number of independent replicates for each sample size.
+
+    seed: int, SeedSequence or None (default=None)
+        Seed of the random number generator.
+
+    sampler: str (default='random')
+        Sampling design (see `draw_standard_normal`).
+
+    Returns
+    -------
+    convergence: Convergence
+        Named tuple with the following fields:
+
+        sample_sizes: ndarray of shape (n_sizes,)
+            Numbers of samples.
+
+        percentiles: ndarray of shape (n_sizes, len(percentiles), n_th, n_regions)
+            Mean percentile estimates across the replicates.
+
+        percentile_std_err: ndarray of shape (n_sizes, len(percentiles), n_th, n_regions)
+            Standard error of the percentile estimates.
+
+        interval_width: ndarray of shape (n_sizes, n_th, n_regions)
+            Mean width of the interval between the first and last percentiles.
+    """
+
+    assert potential_name in Potentials._fields, "{} is not an available potential".format(potential_name)
+
+    replicate_seqs = _get_seed_sequence(seed).spawn(n_replicates)
+
+    estimates = []
+
+    for n_samples in sample_sizes:
+        replicates = []
+
+        for replicate_seq in replicate_seqs:
+            samples = compute_potential_samples(
+                pollutant, emission_region, response_regions, th,
+                n_samples=n_samples, seed=replicate_seq, sampler=sampler
+            )
+            replicates.append(np.percentile(getattr(samples, potential_name), percentiles, axis=0))
+
+        estimates.append(replicates)
+
+    # Get estimates of shape (n_sizes, n_replicates, len(percentiles), n_th, n_regions)
+    estimates = np.array(estimates)
+
+    return Convergence(
+        sample_sizes=np.array(sample_sizes),
+        percentiles=np.mean(estimates, axis=1),
+        percentile_std_err=np.std(estimates, axis=1, ddof=1),
+        interval_width=np.mean(estimates[:, :, -1] - estimates[:, :, 0], axis=1)
+    )
@@ -1,3 +1,7 @@
+# Standard library imports
+from collections import namedtuple
+from functools import lru_cache
+
 # Third party imports
 import numpy as np
 
@@ -6,9 +10,98 @@ from simulations import input_selection, scaling
 from uncertainties import erf, climate_variables
 from utils import constants
 
+# Relative uncertainties of the inputs of the potentials and relative
+# propagated uncertainties of the ARTP and of the ARPP components
+UncertaintyContext = namedtuple(
+    'UncertaintyContext',
+    [
+        'reg_erf_rel_err', 'glo_erf_rel_err', 'reg_erfa_rel_err', 'glo_erfa_rel_err',
+        'temp_ratio_rel_err', 'precip_ratio_rel_err', 'c_scaling_rel_err', 'k_rel_err',
+        'artp_rel_std', 'slow_arpp_rel_std', 'fast_arpp_rel_std'
+    ]
+)
 
-def get_potential_uncertainties(pollutant, emission_region, response_regions, artp, slow_arpp, fast_arpp):
-    """Get propagated uncertainties for the ARTP and the ARPP.
+
+@lru_cache(maxsize=128)
+def _build_uncertainty_context(pollutant, emission_region, region_names):
+    """Build the uncertainty context for a tuple of response region names."""
+
+    # Load constants
+    fp = constants.SPECS[pollutant]['fp']
+    k = constants.SPECS[pollutant]['k']
+    k_std = constants.SPECS[pollutant]['k_std']
+
+    # Get temperature and precipitation stats
+    reg_temp_avg, glo_temp_avg, temp_ratio_std_err, \
+        reg_precip_avg, glo_precip_avg, precip_ratio_std_err = climate_variables.get_climate_stats(list(region_names))
+
+    # Get ERF regional uncertainties
+    if pollutant == 'SO2':
+        reg_erf_avg, reg_erf_std_err = erf.get_so2_regional_uncertainty(emission_region)
+        reg_erfa_avg = fp * reg_erf_avg
+        reg_erfa_std_err = np.abs(fp) * reg_erf_std_err
+
+    else:
+        reg_erf_avg, reg_erf_std_err, reg_erfa_avg, reg_erfa_std_err = erf.get_regional_uncertainty(
+            pollutant, emission_region
+        )
+
+    # Get ERF global uncertainties
+    glo_erf_avg, glo_erf_std_err, glo_erfa_avg, glo_erfa_std_err = erf.get_global_uncertainty(pollutant)
+
+    # Get uncertainty in scaling factor of climate sensitivity
+    mm_scaling = scaling.get_mm_scaling(pollutant)
+    c_scaling_avg, c_scaling_std_err = mm_scaling.c_scaling, mm_scaling.c_scaling_std_err
+
+    # Compute relative uncertainties
+    reg_erf_rel_err = reg_erf_std_err / reg_erf_avg
+    glo_erf_rel_err = glo_erf_std_err / glo_erf_avg
+    reg_erfa_rel_err = reg_erfa_std_err / reg_erfa_avg
+    glo_erfa_rel_err = glo_erfa_std_err / glo_erfa_avg
+    temp_ratio_rel_err = np.array(temp_ratio_std_err) / (np.array(reg_temp_avg) / glo_temp_avg)
+    precip_ratio_rel_err = np.array(precip_ratio_std_err) / (np.array(reg_precip_avg) / glo_precip_avg)
+    c_scaling_rel_err = c_scaling_std_err / c_scaling_avg
+    k_rel_err = k_std / k
+
+    # Compute relative propagated uncertainties for all response regions
+    artp_rel_std = np.sqrt(
+        reg_erf_rel_err ** 2 +
+        glo_erf_rel_err ** 2 +
+        temp_ratio_rel_err ** 2 +
+        c_scaling_rel_err ** 2
+    )
+
+    slow_arpp_rel_std = np.sqrt(
+        reg_erf_rel_err ** 2 +
+        glo_erf_rel_err ** 2 +
+        precip_ratio_rel_err ** 2 +
+        c_scaling_rel_err ** 2 +
+        k_rel_err ** 2
+    )
+
+    fast_arpp_rel_std = np.sqrt(
+        reg_erfa_rel_err ** 2 +
+        glo_erfa_rel_err ** 2 +
+        precip_ratio_rel_err ** 2
+    )
+
+    for rel_err in [temp_ratio_rel_err, precip_ratio_rel_err, artp_rel_std, slow_arpp_rel_std, fast_arpp_rel_std]:
+        rel_err.flags.writeable = False
+
+    return UncertaintyContext(
+        reg_erf_rel_err, glo_erf_rel_err, reg_erfa_rel_err, glo_erfa_rel_err,
+        temp_ratio_rel_err, precip_ratio_rel_err, c_scaling_rel_err, k_rel_err,
+        artp_rel_std, slow_arpp_rel_std, fast_arpp_rel_std
+    )
+
+
+def get_uncertainty_context(pollutant, emission_region, response_regions):
+    """Get the relative uncertainties needed to propagate uncertainties to the potentials.
+
+    This is the expensive part of the uncertainty propagation (it loads the control
+    runs and the ERF data) and is cached on (`pollutant`, `emission_region`,
+    `response_regions`). Use `apply_uncertainty_context` to get the uncertainties
+    of any number of potentials.
 
     Parameters
     ----------
@@ -36,22 +129,12 @@ def get_potential_uncertainties(pollutant, emission_region, response_regions, ar
     response_regions: list of str
         Names of the response regions.
 
-    artp: array of floats
-        Pulse or integrated ARTP.
-
-    slow_arpp: array of floats
-        Slow component of either the pulse or integrated ARPP.
-
-    fast_arpp: array of floats
-        Fast component of either the pulse or integrated ARPP.
-
     Returns
     -------
-    artp_std: array of floats
-        Propagated uncertainty for the ARTP for all `response_regions`.
-
-    arpp_std: array of floats
-        Propagated uncertainty for the ARPP for all `response_regions`.
+    context: UncertaintyContext
+        Named tuple with the relative uncertainties of the inputs
+        and the relative propagated uncertainties of the ARTP and of the
+        slow and fast ARPP components for all `response_regions`.
     """
 
     assert pollutant in constants.POLLUTANTS, "{} is not an accepted pollutant".format(pollutant)
@@ -63,80 +146,102 @@ def get_potential_uncertainties(pollutant, emission_region, response_regions, ar
         assert emission_region in constants.SO2_EMISS_REGIONS, \
             "{} is not an accepted emission region for {}".format(emission_region, pollutant)
 
-    # Load constants
-    fp = constants.SPECS[pollutant]['fp']
-    k = constants.SPECS[pollutant]['k']
-    k_std = constants.SPECS[pollutant]['k_std']
-
     # Get region names
     if 'All regions' in response_regions:
         region_names = input_selection.get_response_regions()
     else:
         region_names = response_regions
 
-    n_regions = len(region_names)
+    return _build_uncertainty_context(pollutant, emission_region, tuple(region_names))
 
-    # Get temperature and precipitation stats
-    reg_temp_avg, glo_temp_avg, temp_ratio_std_err, \
-        reg_precip_avg, glo_precip_avg, precip_ratio_std_err = climate_variables.get_climate_stats(region_names)
 
-    # Get ERF regional uncertainties
-    if pollutant == 'SO2':
-        reg_erf_avg, reg_erf_std_err = erf.get_so2_regional_uncertainty(emission_region)
-        reg_erfa_avg = fp * reg_erf_avg
-        reg_erfa_std_err = np.abs(fp) * reg_erf_std_err
+def apply_uncertainty_context(context, artp, slow_arpp, fast_arpp):
+    """Get propagated uncertainties for the ARTP and the ARPP from
+    the relative uncertainties of an uncertainty context.
 
-    else:
-        reg_erf_avg, reg_erf_std_err, reg_erfa_avg, reg_erfa_std_err = erf.get_regional_uncertainty(
-            pollutant, emission_region
-        )
+    Parameters
+    ----------
+    context: UncertaintyContext
+        Uncertainty context returned by `get_uncertainty_context`.
 
-    # Get ERF global uncertainties
-    glo_erf_avg, glo_erf_std_err, glo_erfa_avg, glo_erfa_std_err = erf.get_global_uncertainty(pollutant)
+    artp: array of floats
+        Pulse or integrated ARTP. The last dimension must match
+        the response regions of `context` (or be broadcastable
+        to them), e.g. a (time x region) array.
 
-    # Get uncertainty in scaling factor of climate sensitivity
-    c_scaling_avg, c_scaling_std_err = scaling.get_mm_scaling(pollutant)[2:4]
-
-    # Compute uncertainties for all response regions
-    artp_std = []
-    slow_arpp_std = []
-    fast_arpp_std = []
-
-    for i in range(n_regions):
-
-        artp_std.append(
-            np.sqrt(
-                (reg_erf_std_err / reg_erf_avg) ** 2 +
-                (glo_erf_std_err / glo_erf_avg) ** 2 +
-                (temp_ratio_std_err[i] / (reg_temp_avg[i] / glo_temp_avg)) ** 2 +
-                (c_scaling_std_err / c_scaling_avg) ** 2
-            )
-        )
+    slow_arpp: array of floats
+        Slow component of either the pulse or integrated ARPP.
 
-        slow_arpp_std.append(
-            np.sqrt(
-                (reg_erf_std_err / reg_erf_avg) ** 2 +
-                (glo_erf_std_err / glo_erf_avg) ** 2 +
-                (precip_ratio_std_err[i] / (reg_precip_avg[i] / glo_precip_avg)) ** 2 +
-                (c_scaling_std_err / c_scaling_avg) ** 2 +
-                (k_std / k) ** 2
-            )
-        )
+    fast_arpp: array of floats
+        Fast component of either the pulse or integrated ARPP.
 
-        fast_arpp_std.append(
-            np.sqrt(
-                (reg_erfa_std_err / reg_erfa_avg) ** 2 +
-                (glo_erfa_std_err / glo_erfa_avg) ** 2 +
-                (precip_ratio_std_err[i] / (reg_precip_avg[i] / glo_precip_avg)) ** 2
-            )
-        )
+    Returns
+    -------
+    artp_std: array of floats
+        Propagated uncertainty for the ARTP.
+
+    arpp_std: array of floats
+        Propagated uncertainty for the ARPP.
+    """
 
     # Compute artp propagated standard deviation
-    artp_std = abs(artp) * np.array(artp_std)
+    artp_std = np.abs(artp) * context.artp_rel_std
 
     # Compute arpp propagated standard deviation
-    slow_arpp_std = abs(slow_arpp) * np.array(slow_arpp_std)
-    fast_arpp_std = abs(fast_arpp) * np.array(fast_arpp_std)
+    slow_arpp_std = np.abs(slow_arpp) * context.slow_arpp_rel_std
+    fast_arpp_std = np.abs(fast_arpp) * context.fast_arpp_rel_std
     arpp_std = np.sqrt(slow_arpp_std ** 2 + fast_arpp_std ** 2)
 
     return artp_std, arpp_std
+
+
+def get_potential_uncertainties(pollutant, emission_region, response_regions, artp, slow_arpp, fast_arpp):
+    """Get propagated uncertainties for the ARTP and the ARPP.
+
+    Parameters
+    ----------
+    pollutant: str
+        One of the following four options:
+        - SO2
+        - BC
+        - CO2
+        - CH4
+
+    emission_region: str
+        The name of the pollutant emission region.
+        For SO2, CO2 and CH4, one of the following options:
+        - NHML
+        - US
+        - China
+        - EastAsia
+        - India
+        - Europe
+
+        For BC, one of the following options:
+        - Global
+        - Asia
+
+    response_regions: list of str
+        Names of the response regions.
+
+    artp: array of floats
+        Pulse or integrated ARTP.
+
+    slow_arpp: array of floats
+        Slow component of either the pulse or integrated ARPP.
+
+    fast_arpp: array of floats
+        Fast component of either the pulse or integrated ARPP.
+
+    Returns
+    -------
+    artp_std: array of floats
+        Propagated uncertainty for the ARTP for all `response_regions`.
+
+    arpp_std: array of floats
+        Propagated uncertainty for the ARPP for all `response_regions`.
+    """
+
+    context = get_uncertainty_context(pollutant, emission_region, response_regions)
+
+    return apply_uncertainty_context(context, artp, slow_arpp, fast_arpp)
@@ -3,11 +3,15 @@ import os
 
 # Third party imports
 import netCDF4
+import numpy as np
 
 # Repo paths
 SRC_PATH = "data/so2_original/"
 DST_PATH = "data/so2/"
 
+# zlib compression level of the written gridded fields
+COMPRESSION_LEVEL = 4
+
 
 def copy_selected_variables(file_a, file_b, vars_to_copy):
 
@@ -37,6 +41,87 @@ def copy_selected_variables(file_a, file_b, vars_to_copy):
                 dst[name][:] = src[name][:]
 
 
+def write_gridded_fields(path, fields, th, lat, lon, attributes=None):
+    """Write gridded fields with a leading time horizon dimension to a netCDF
+    file. The fields are compressed with zlib and chunked by time horizon,
+    so that the map of a single time horizon can be read on its own.
+
+    Parameters
+    ----------
+    path: str
+        Path of the netCDF file.
+
+    fields: dict
+        Arrays of shape (n_th, n_lat, n_lon) to write, by variable name.
+
+    th: array of floats
+        Time horizons.
+
+    lat: array of floats
+        Latitude of the grid cells.
+
+    lon: array of floats
+        Longitude of the grid cells.
+
+    attributes: dict or None (default=None)
+        Global attributes of the file.
+    """
+
+    th = np.atleast_1d(th)
+
+    with netCDF4.Dataset(path, "w") as dst:
+
+        if attributes is not None:
+            dst.setncatts(attributes)
+
+        # Create the dimensions and their coordinate variables
+        for name, values in [('th', th), ('latitude', lat), ('longitude', lon)]:
+            dst.createDimension(name, len(values))
+            dst.createVariable(name, 'f8', (name,))[:] = values
+
+        for name, values in fields.items():
+            variable = dst.createVariable(
+                varname=name,
+                datatype='f8',
+                dimensions=('th', 'latitude', 'longitude'),
+                zlib=True,
+                complevel=COMPRESSION_LEVEL,
+                chunksizes=(1, len(lat), len(lon)),
+                fill_value=np.nan
+            )
+            variable[:] = values
+
+
+def read_gridded_fields(path):
+    """Read the gridded fields written by `write_gridded_fields`.
+
+    Returns
+    -------
+    fields: dict
+        Arrays of shape (n_th, n_lat, n_lon), by variable name
+        (NaN in grid cells without values).
+
+    th: ndarray of floats
+        Time horizons.
+
+    lat: ndarray of floats
+        Latitude of the grid cells.
+
+    lon: ndarray of floats
+        Longitude of the grid cells.
+    """
+
+    with netCDF4.Dataset(path) as src:
+        th, lat, lon = (np.array(src.variables[name][:]) for name in ['th', 'latitude', 'longitude'])
+
+        fields = {
+            name: np.ma.filled(variable[:], np.nan) for name, variable in src.variables.items()
+            if variable.dimensions == ('th', 'latitude', 'longitude')
+        }
+
+    return fields, th, lat, lon
+
+
 if __name__ == '__main__':
 
     variables = ['longitude', 'latitude', 't', 'surface', 'temp', 'precip', 'field569', 'field569_1']
@@ -73,3 +73,156 @@ def compute_covariance(var_a, var_b, std_err=False):
         cov_ab = cov_ab / np.sqrt(np.count_nonzero(~np.isnan(var_a)) * np.count_nonzero(~np.isnan(var_b)))
 
     return cov_ab
+
+
+def compute_covariance_matrix(variables, std_err=False):
+    """Compute the covariance matrix of a set of variables using Numpy function.
+    If `std_err` is True, compute the covariances using the standard error
+    instead of the standard deviation.
+
+    Parameters
+    ----------
+    variables: array-like of shape (n_variables, n_observations)
+        Each row contains the observations of a variable.
+
+    std_err: boolean (default=False)
+        If True, compute the covariances using the standard error.
+        If False, compute the covariances using the standard deviation.
+
+    Return
+    ------
+    cov: ndarray of shape (n_variables, n_variables)
+        Covariance matrix of the variables.
+    """
+
+    variables = np.asarray(variables, dtype=float)
+
+    cov = np.cov(variables, ddof=1)
+
+    if std_err:
+        n_obs = np.count_nonzero(~np.isnan(variables), axis=1)
+        cov = cov / np.sqrt(np.outer(n_obs, n_obs))
+
+    return cov
+
+
+def merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Merge the streaming moments of two sets of observations
+    (Chan et al. parallel algorithm). Merging the same sets in
+    the same order always gives the same results.
+
+    Parameters
+    ----------
+    count_a, count_b: int
+        Number of observations of each set.
+
+    mean_a, mean_b: float or array of floats
+        Means of each set.
+
+    m2_a, m2_b: float or array of floats
+        Sums of the squared differences from the mean of each set.
+
+    Returns
+    -------
+    count: int
+        Number of observations of the merged set.
+
+    mean: float or array of floats
+        Mean of the merged set.
+
+    m2: float or array of floats
+        Sum of the squared differences from the mean of the merged set.
+    """
+
+    count = count_a + count_b
+
+    if count_a == 0:
+        return count, mean_b, m2_b
+    if count_b == 0:
+        return count, mean_a, m2_a
+
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta ** 2 * (count_a * count_b / count)
+
+    return count, mean, m2
+
+
+def compute_comoments(variables):
+    """Compute the moments and co-moments of a set of observations of
+    several variables. Observations with NaN values are discarded.
+
+    Parameters
+    ----------
+    variables: array-like of shape (n_variables, n_observations)
+        Each row contains the observations of a variable.
+
+    Returns
+    -------
+    count: int
+        Number of observations.
+
+    mean: ndarray of shape (n_variables,)
+        Mean of each variable.
+
+    comoment: ndarray of shape (n_variables, n_variables)
+        Sums of the products of the differences from the mean
+        of each pair of variables (the diagonal contains the sums
+        of the squared differences from the mean).
+    """
+
+    variables = np.asarray(variables, dtype=float)
+    variables = variables[:, ~np.any(np.isnan(variables), axis=0)]
+
+    count = variables.shape[1]
+
+    if count == 0:
+        n_variables = variables.shape[0]
+        return 0, np.zeros(n_variables), np.zeros((n_variables, n_variables))
+
+    mean = np.mean(variables, axis=1)
+    deviations = variables - mean[:, np.newaxis]
+
+    return count, mean, deviations @ deviations.T
+
+
+def merge_comoments(count_a, mean_a, comoment_a, count_b, mean_b, comoment_b):
+    """Merge the streaming moments and co-moments of two sets of observations
+    of several variables (Chan et al. parallel algorithm, which reduces to the
+    Welford update when one of the sets has a single observation).
+
+    Parameters
+    ----------
+    count_a, count_b: int
+        Number of observations of each set.
+
+    mean_a, mean_b: ndarray of shape (n_variables,)
+        Means of each set.
+
+    comoment_a, comoment_b: ndarray of shape (n_variables, n_variables)
+        Co-moments of each set (see `compute_comoments`).
+
+    Returns
+    -------
+    count: int
+        Number of observations of the merged set.
+
+    mean: ndarray of shape (n_variables,)
+        Mean of the merged set.
+
+    comoment: ndarray of shape (n_variables, n_variables)
+        Co-moments of the merged set.
+    """
+
+    count = count_a + count_b
+
+    if count_a == 0:
+        return count, mean_b, comoment_b
+    if count_b == 0:
+        return count, mean_a, comoment_a
+
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    comoment = comoment_a + comoment_b + np.outer(delta, delta) * (count_a * count_b / count)
+
+    return count, mean, comoment